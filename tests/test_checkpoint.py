@@ -0,0 +1,43 @@
+import pytest
+
+import utils.web_scraping_utils as scraper
+from utils.checkpoint import CheckpointStore
+from utils.http_fetcher import AsyncFetcher
+from utils.indeed_standin import StandinServer
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+class ListWriter(list):
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.fail_after = fail_after
+
+    def writerow(self, row):
+        if len(self) == self.fail_after:
+            raise KeyboardInterrupt
+        self.append(row)
+
+
+def scrape(writer, checkpoint, server):
+    rate_limiter = AdaptiveRateLimiter(initial_rate=1000.0, min_rate=500.0, max_rate=1000.0)
+    with AsyncFetcher(rate_limiter=rate_limiter) as backend:
+        scraper.scrape_jobs(writer, None, ['Data Analyst'], ['Paris', 'Lyon'], 'France',
+                            server.base_url, backend=backend, checkpoint=checkpoint)
+
+
+def test_checkpoint_is_cleared_after_a_complete_run(tmp_path):
+    path = str(tmp_path / 'run.checkpoint.sqlite')
+    with StandinServer() as server:
+        with CheckpointStore(path) as checkpoint:
+            with pytest.raises(KeyboardInterrupt):
+                scrape(ListWriter(fail_after=20), checkpoint, server)
+        with CheckpointStore(path) as checkpoint:
+            assert checkpoint.is_page_done('Data Analyst', 'Paris', 0)
+            resumed = ListWriter()
+            scrape(resumed, checkpoint, server)
+            assert checkpoint.is_search_done('Data Analyst', 'Paris') is False
+        with CheckpointStore(path) as checkpoint:
+            fresh = ListWriter()
+            scrape(fresh, checkpoint, server)
+
+    assert 0 < len(resumed) < len(fresh)
@@ -0,0 +1,60 @@
+from urllib.request import urlopen
+
+from selenium.common.exceptions import WebDriverException
+
+from utils.driver_pool import DriverPool
+from utils.indeed_standin import StandinServer
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+class FakeDriver:
+    '''Minimal WebDriver stand-in that loads pages with urllib.'''
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.page_source = ''
+        self.current_url = 'about:blank'
+        self.quit_called = False
+
+    def get(self, url):
+        if self.failures:
+            self.failures -= 1
+            self.current_url = None
+            raise WebDriverException('browser crashed')
+        with urlopen(url) as response:
+            self.page_source = response.read().decode('utf-8')
+        self.current_url = url
+
+    def find_element(self, by, value):
+        return object()
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(started):
+    def driver_factory():
+        started.append(FakeDriver())
+        return started[-1]
+    rate_limiter = AdaptiveRateLimiter(initial_rate=1000.0, min_rate=500.0, max_rate=1000.0)
+    return DriverPool(size=1, driver_factory=driver_factory, rate_limiter=rate_limiter)
+
+
+def test_adopted_driver_is_replaced_after_a_crash():
+    started = []
+    driver = FakeDriver(failures=1)
+    with StandinServer() as server, make_pool(started) as pool:
+        pool.adopt(driver)
+        assert pool.get_dom(f'{server.base_url}/jobs?q=Data&l=Paris') is not None
+    assert driver.quit_called
+    assert len(started) == 1 and started[0].quit_called
+
+
+def test_close_leaves_adopted_driver_running():
+    started = []
+    driver = FakeDriver()
+    with StandinServer() as server, make_pool(started) as pool:
+        pool.adopt(driver)
+        assert pool.get_dom(f'{server.base_url}/jobs?q=Data&l=Paris') is not None
+    assert not driver.quit_called
+    assert started == []
@@ -0,0 +1,92 @@
+import datetime as dt
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.exchange_rates import ExchangeRateProvider
+from utils.salary_extractor import process_salaries
+
+# Units of each currency per EUR, as Frankfurter quotes them
+PER_EUR = {'USD': 1.25, 'SEK': 10.0}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''Minimal Frankfurter API: /latest and /<start>..<end> date ranges.'''
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        currencies = parse_qs(parts.query)['to'][0].split(',')
+        rates = {currency: PER_EUR[currency] for currency in currencies}
+        path = parts.path.strip('/')
+        if path == 'latest':
+            body = {'base': 'EUR', 'date': '2024-03-01', 'rates': rates}
+        else:
+            start, end = (dt.date.fromisoformat(date) for date in path.split('..'))
+            days = [start + dt.timedelta(days=n) for n in range((end - start).days + 1)]
+            body = {'base': 'EUR', 'rates': {day.isoformat(): rates
+                                             for day in days if day.weekday() < 5}}
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def stub_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def offline_url():
+    # A port that was just free, so connections are refused
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.server_close()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def test_rates_are_cached(tmp_path, stub_url):
+    with ExchangeRateProvider(str(tmp_path / 'rates.sqlite'), base_url=stub_url) as provider:
+        assert provider.latest(['USD', 'SEK']) == {'USD': 0.8, 'SEK': 0.1, 'EUR': 1.0}
+        provider.latest(['USD'])
+        # Saturday takes Friday's rate
+        dates = [dt.date(2024, 2, 2), dt.date(2024, 2, 3)]
+        rates = provider.historical(['USD'], dates)
+        assert rates[dates[1]]['USD'] == pytest.approx(0.8)
+        provider.historical(['USD'], dates)
+        assert provider.requests == 2
+
+
+def test_stale_cache_is_used_when_offline(tmp_path, stub_url, offline_url):
+    path = str(tmp_path / 'rates.sqlite')
+    with ExchangeRateProvider(path, base_url=stub_url) as provider:
+        provider.latest(['USD'])
+    with ExchangeRateProvider(path, base_url=offline_url, ttl=0, timeout=1) as provider:
+        assert provider.latest(['USD'])['USD'] == pytest.approx(0.8)
+        assert provider.requests == 1
+
+
+def test_first_run_offline(offline_url):
+    with ExchangeRateProvider(None, base_url=offline_url, timeout=1) as provider:
+        with pytest.raises(RuntimeError):
+            provider.latest(['USD'])
+        df = pd.DataFrame({'currency': ['euro', 'dollar'],
+                           'min_salary_monthly': [3000.0, 4000.0],
+                           'max_salary_monthly': [3500.0, np.nan]})
+        converted = process_salaries(df, provider)
+    assert converted['min_salary_month_EUR'].iloc[0] == 3000.0
+    assert np.isnan(converted['min_salary_month_EUR'].iloc[1])
@@ -0,0 +1,27 @@
+from utils.http_fetcher import AsyncFetcher
+from utils.indeed_standin import StandinConfig, StandinServer
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+def make_fetcher(**kwargs):
+    rate_limiter = AdaptiveRateLimiter(initial_rate=1000.0, min_rate=500.0, max_rate=1000.0)
+    return AsyncFetcher(rate_limiter=rate_limiter, retry_backoff=0.01, **kwargs)
+
+
+def test_server_errors_are_retried():
+    with StandinServer(StandinConfig(error_rate=0.3)) as server:
+        urls = [f'{server.base_url}/viewjob?jk={job_key}'
+                for job_key in server.search_job_keys('Data Analyst', 'Paris')[:10]]
+        server.counts.clear()
+        with make_fetcher(max_retries=10) as backend:
+            doms = backend.get_doms(urls)
+
+    assert all(dom is not None for dom in doms)
+    assert server.counts['requests'] == len(urls) + server.counts.get('errors', 0)
+
+
+def test_other_statuses_are_not_retried():
+    with StandinServer() as server:
+        with make_fetcher() as backend:
+            assert backend.get_page_source(f'{server.base_url}/missing') is None
+        assert server.counts['requests'] == 1
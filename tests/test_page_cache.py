@@ -0,0 +1,30 @@
+import utils.web_scraping_utils as scraper
+from utils.http_fetcher import AsyncFetcher
+from utils.indeed_standin import StandinServer
+from utils.page_cache import PageCache
+from utils.rate_limiter import AdaptiveRateLimiter
+
+
+class ListWriter(list):
+    def writerow(self, row):
+        self.append(row)
+
+
+def test_replay_recorded_pages_without_a_driver(tmp_path):
+    directory = str(tmp_path / 'page_cache')
+    recorded = ListWriter()
+    with StandinServer() as server:
+        rate_limiter = AdaptiveRateLimiter(initial_rate=1000.0, min_rate=500.0, max_rate=1000.0)
+        with PageCache(directory) as cache, \
+                AsyncFetcher(rate_limiter=rate_limiter, cache=cache) as backend:
+            scraper.scrape_jobs(recorded, None, ['Data Analyst'], ['Paris'], 'France',
+                                server.base_url, backend=backend)
+        base_url = server.base_url
+
+    replayed = ListWriter()
+    with PageCache(directory, replay=True) as cache:
+        scraper.scrape_jobs(replayed, None, ['Data Analyst'], ['Paris'], 'France',
+                            base_url, cache=cache)
+
+    assert len(recorded) == 45
+    assert replayed == recorded
@@ -0,0 +1,29 @@
+import threading
+import time
+
+import pytest
+
+from utils.rate_limiter import AdaptiveRateLimiter
+
+URL = 'https://fr.indeed.com/jobs?q=Data'
+
+
+def test_acquire_spaces_requests_at_the_host_rate():
+    rate_limiter = AdaptiveRateLimiter(initial_rate=10.0, jitter=0.0)
+    assert rate_limiter.acquire(URL) == 0.0
+    assert rate_limiter.acquire(URL) == pytest.approx(0.1, abs=0.01)
+    assert rate_limiter.acquire('https://se.indeed.com/jobs') == 0.0
+
+
+def test_rate_cut_slows_requests_already_waiting():
+    rate_limiter = AdaptiveRateLimiter(initial_rate=10.0, jitter=0.0)
+    start = time.monotonic()
+    rate_limiter.wait(URL)
+    waiter = threading.Thread(target=rate_limiter.wait, args=(URL,))
+    waiter.start()
+    time.sleep(0.02)
+    # Two failures cut the rate to 2.5 requests/s, a 0.4 s gap
+    rate_limiter.record(URL, 0.01, ok=False)
+    rate_limiter.record(URL, 0.01, ok=False)
+    waiter.join()
+    assert time.monotonic() - start >= 0.35
@@ -0,0 +1,36 @@
+import os
+
+from utils.http_fetcher import AsyncFetcher
+from utils.indeed_standin import StandinConfig, StandinServer
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.repair import find_missing, read_dataset, repair_dataframe, write_dataset
+from utils.sinks import ParquetSink
+
+DESCRIPTION = {'job_description': 'job_description'}
+
+
+def test_repair_parquet_sink_output(tmp_path):
+    path = str(tmp_path / 'indeed_jobs_France.parquet')
+    with StandinServer(StandinConfig(salary_rate=1.0)) as server:
+        job_keys = server.search_job_keys('Data Analyst', 'Paris')[:5]
+        # Two flushes, so the dataset has several part files
+        with ParquetSink(path, flush_every=3) as sink:
+            for job_key in job_keys:
+                sink.writerow([1, 'France', f'{server.base_url}/viewjob?jk={job_key}',
+                               'Data Analyst', 'Paris', 'Data Analyst', 'Company', 'Paris',
+                               'Not available', 'Not available'])
+        assert len(os.listdir(path)) == 2
+
+        df = read_dataset(path)
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0)
+        with AsyncFetcher(rate_limiter=rate_limiter) as backend:
+            patched = repair_dataframe(df, backend)
+        write_dataset(df, path)
+
+    assert patched == 10
+    assert os.path.isdir(path)
+    assert len(os.listdir(path)) == 1
+    repaired = read_dataset(path)
+    assert len(repaired) == 5
+    assert not find_missing(repaired, DESCRIPTION).any()
+    assert not os.path.exists(f'{path}.tmp') and not os.path.exists(f'{path}.old')
@@ -0,0 +1,23 @@
+import time
+
+from utils.task_queue import TaskQueue
+
+
+def test_expired_lease_on_last_attempt_fails_the_task(tmp_path):
+    with TaskQueue(str(tmp_path / 'queue.sqlite'), visibility_timeout=0.01,
+                   max_attempts=2) as queue:
+        queue.put('search', {'job_keyword': 'Data'})
+        for attempt in (1, 2):
+            # The worker dies without completing or failing the task
+            [task] = queue.lease('worker')
+            assert task.attempts == attempt
+            time.sleep(0.02)
+        assert queue.lease('worker') == []
+        assert queue.counts() == {'failed': 1}
+
+
+def test_shared_queue_uses_rollback_journal(tmp_path):
+    with TaskQueue(str(tmp_path / 'local.sqlite')) as queue:
+        assert queue._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    with TaskQueue(str(tmp_path / 'shared.sqlite'), shared=True) as queue:
+        assert queue._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
@@ -0,0 +1,446 @@
+"""
+Benchmarks for the scraping and parsing pipeline.
+Each benchmark returns a dictionary of timings so results can be printed
+or collected into a DataFrame from a notebook.
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+
+# Third-party library imports
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from lxml import etree as et
+
+# Local imports
+import utils.web_scraping_utils as scraper
+from utils.driver_pool import DriverPool, get_driver_rss, quit_driver
+from utils.http_fetcher import AsyncFetcher
+from utils.indeed_standin import StandinConfig, StandinServer
+from utils.metrics import METRICS, disable_metrics, enable_metrics
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.repair import find_missing, repair_dataframe
+from utils.salary_cache import SalaryParseCache
+from utils.salary_extractor import (SALARY_PARSER_VERSION, SALARY_PARSERS, normalize_salaries,
+                                    valid_salary_mask)
+
+# Limiter that never waits, so page timings exclude politeness delays
+NO_WAIT_LIMITER = AdaptiveRateLimiter(initial_rate=1e9, max_rate=1e9, min_rate=1e9)
+
+
+def _legacy_extract_cards(page_content: str) -> List[tuple]:
+    '''Card extraction as done before the single-parse pipeline.'''
+    dom = et.HTML(str(BeautifulSoup(page_content, 'html.parser')))
+    cards = []
+    for job in dom.xpath('//div[@class="job_seen_beacon"]'):
+        fields = []
+        for xpath in ('./descendant::h2/a/@href',
+                      './descendant::h2/a/span/text()',
+                      './/span[@data-testid="company-name"]/text()',
+                      './/div[@data-testid="text-location"]/text()'):
+            try:
+                fields.append(job.xpath(xpath)[0])
+            except Exception:
+                fields.append('Not available')
+        cards.append(tuple(fields))
+    return cards
+
+
+def _extract_cards(page_content: str) -> List[scraper.JobCard]:
+    return scraper.extract_job_cards(scraper.parse_dom(page_content))
+
+
+def benchmark_card_extraction(html_paths: List[str], repeat: int = 5) -> Dict[str, float]:
+    '''Compare legacy and single-parse card extraction over saved results pages.'''
+    pages = []
+    for path in html_paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+
+    results = {'pages': len(pages)}
+    for name, extract in (('legacy', _legacy_extract_cards), ('single_parse', _extract_cards)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            n_cards = sum(len(extract(page)) for page in pages)
+        elapsed = time.perf_counter() - start
+        results[f'{name}_cards'] = n_cards
+        results[f'{name}_ms_per_page'] = 1000 * elapsed / (repeat * max(len(pages), 1))
+    results['speedup'] = results['legacy_ms_per_page'] / max(results['single_parse_ms_per_page'], 1e-9)
+    return results
+
+
+def benchmark_browser_profiles(urls: List[str],
+                               profiles: Optional[List[str]] = None) -> List[Dict[str, float]]:
+    '''
+    Load the same URLs with each browser profile and report per-page latency
+    and the peak resident memory of the browser processes (needs psutil).
+    '''
+    profiles = profiles or list(scraper.BROWSER_PROFILES)
+    results = []
+    for profile in profiles:
+        start = time.perf_counter()
+        driver = scraper.initialize_driver(profile)
+        startup = time.perf_counter() - start
+        latencies, peak_rss = [], 0
+        try:
+            for url in urls:
+                start = time.perf_counter()
+                scraper.fetch_page_source(url, driver, NO_WAIT_LIMITER)
+                latencies.append(time.perf_counter() - start)
+                peak_rss = max(peak_rss, get_driver_rss(driver) or 0)
+        finally:
+            quit_driver(driver)
+        latencies.sort()
+        results.append({
+            'profile': profile,
+            'startup_s': startup,
+            'mean_page_s': sum(latencies) / len(latencies),
+            'p95_page_s': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+            'peak_rss_mb': peak_rss / 1024 ** 2,
+        })
+    return results
+
+
+DESCRIPTION_COLUMN = {'job_description': 'job_description'}
+
+
+class _RecordCollector(list):
+    '''In-memory csv_writer stand-in.'''
+    writerow = list.append
+
+
+def _make_backend(backend: str, workers: int):
+    if backend == 'http':
+        return AsyncFetcher(max_per_host=workers, rate_limiter=NO_WAIT_LIMITER)
+    if backend == 'browser':
+        return DriverPool(size=workers, rate_limiter=NO_WAIT_LIMITER, profile='lean')
+    raise ValueError(f'Unknown backend: {backend}')
+
+
+def benchmark_scrape_throughput(backends: Sequence[str] = ('http',),
+                                concurrency: Sequence[int] = (1, 2, 4),
+                                config: Optional[StandinConfig] = None,
+                                job_keywords: Sequence[str] = ('Data+Analyst', 'Data+Scientist'),
+                                location_keywords: Sequence[str] = ('Paris (75)', 'Lyon (69)'),
+                                extractor: str = 'xpath', repair: bool = True,
+                                quiet: bool = True) -> List[Dict[str, float]]:
+    '''
+    Run scrape_jobs against a local Indeed stand-in for every backend and
+    concurrency setting, without politeness delays. Reports throughput,
+    the share of postings scraped and of rows with complete details, and
+    with repair, the completeness after one repair pass over missing fields.
+    '''
+    config = config or StandinConfig()
+    results = []
+    with StandinServer(config) as server:
+        expected_jobs = {job_key for job_keyword in job_keywords
+                         for location_keyword in location_keywords
+                         for job_key in server.search_job_keys(job_keyword, location_keyword)}
+        for backend_name in backends:
+            for workers in concurrency:
+                records = _RecordCollector()
+                backend = _make_backend(backend_name, workers)
+                output = io.StringIO()
+                enable_metrics()
+                try:
+                    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+                        start = time.perf_counter()
+                        scraper.scrape_jobs(records, None, list(job_keywords),
+                                            list(location_keywords), 'Benchmark',
+                                            server.base_url, backend=backend,
+                                            max_workers=workers, extractor=extractor)
+                        elapsed = time.perf_counter() - start
+                        counters = METRICS.counters()
+                        df = pd.DataFrame(records, columns=scraper.CSV_COLUMNS)
+                        # A salary may legitimately be absent, a description may not
+                        missing_before = int(find_missing(df, DESCRIPTION_COLUMN).sum())
+                        if repair:
+                            repair_dataframe(df, backend, DESCRIPTION_COLUMN)
+                finally:
+                    backend.close()
+                    disable_metrics()
+
+                scraped_jobs = set(df['job_link'].map(scraper.get_job_key))
+                result = {
+                    'backend': backend_name,
+                    'workers': workers,
+                    'elapsed_s': elapsed,
+                    'pages_loaded': counters.get('pages_loaded', 0),
+                    'pages_per_second': counters.get('pages_loaded', 0) / elapsed,
+                    'jobs_written': len(df),
+                    'jobs_per_second': len(df) / elapsed,
+                    'page_failures': counters.get('page_failures', 0),
+                    'blocked_pages': counters.get('blocked_pages', 0),
+                    'job_coverage': len(scraped_jobs & expected_jobs) / len(expected_jobs),
+                    'complete_rows': 1 - missing_before / max(len(df), 1),
+                }
+                if repair:
+                    result['complete_rows_after_repair'] = 1 - find_missing(
+                        df, DESCRIPTION_COLUMN).sum() / max(len(df), 1)
+                results.append(result)
+    return results
+
+
+def _legacy_parse_french_salary(s: pd.Series) -> pd.DataFrame:
+    def extract_numbers(row: str) -> List[float]:
+        numbers = re.findall(r'[\d\s\xa0]+(?:,\d+)?', row)
+        numbers = [float(num.replace('\xa0', '').replace(' ', '').replace(',', '.'))
+                   for num in numbers if num.strip()]
+        return [numbers[0], numbers[1] if len(numbers) >= 2 else numbers[0]]
+
+    numbers = s.apply(extract_numbers)
+    return pd.DataFrame({
+        'min_salary': numbers.apply(lambda x: x[0] if x else None),
+        'max_salary': numbers.apply(lambda x: x[1] if x else None),
+        'currency': np.where(s.str.contains('€|euro', case=False), 'euro', None)
+    })
+
+
+def _legacy_parse_swedish_salary(s: pd.Series) -> pd.DataFrame:
+    numbers = s.str.findall(r'[\d]+\s*[\d]*').apply(lambda x: [x[0], x[1] if len(x) >= 2 else x[0]])
+    return pd.DataFrame({
+        'min_salary': pd.to_numeric(numbers.str[0].str.replace(r'\s+', '', regex=True), errors='coerce'),
+        'max_salary': pd.to_numeric(numbers.str[1].str.replace(r'\s+', '', regex=True), errors='coerce'),
+        'currency': np.where(s.str.contains('kr|kronor|sek', case=False), 'sek', None)
+    })
+
+
+def _legacy_parse_italian_salary(s: pd.Series) -> pd.DataFrame:
+    s = s.apply(lambda x: re.sub(r'(\d+)\.(\d{3})', r'\1\2', str(x)))
+    numbers = s.str.findall(r'\d+').apply(lambda x: [x[0], x[1] if len(x) >= 2 else x[0]])
+    return pd.DataFrame({
+        'min_salary': pd.to_numeric(numbers.str[0], errors='coerce'),
+        'max_salary': pd.to_numeric(numbers.str[1], errors='coerce'),
+        'currency': np.where(s.str.contains('€|euro', case=False), 'euro', None)
+    })
+
+
+def _legacy_parse_usa_salary(s: pd.Series) -> pd.DataFrame:
+    numbers = (s.str.findall(r'\$?(\d+(?:,\d{3})*(?:\.\d{2})?|\d+)')
+               .apply(lambda x: [x[0], x[1] if len(x) >= 2 else x[0]]))
+    return pd.DataFrame({
+        'min_salary': pd.to_numeric(numbers.str[0].str.replace(',', ''), errors='coerce'),
+        'max_salary': pd.to_numeric(numbers.str[1].str.replace(',', ''), errors='coerce'),
+        'currency': np.where(s.str.contains(r'\$|dollar', case=False), 'dollar', None)
+    })
+
+
+# Per-row parsers as they were before vectorization, for comparison
+LEGACY_SALARY_PARSERS = {
+    'France': _legacy_parse_french_salary,
+    'Sweden': _legacy_parse_swedish_salary,
+    'Italy': _legacy_parse_italian_salary,
+    'USA': _legacy_parse_usa_salary,
+}
+
+# Synthetic salary formats: (template, thousands separator, yearly range of the low end)
+SYNTHETIC_SALARY_FORMATS = {
+    'France': ('{low} € - {high} € par an', ' ', (30000, 70000)),
+    'Sweden': ('{low} kr - {high} kr per månad', ' ', (30000, 70000)),
+    'Italy': ("{low} € - {high} € all'anno", '.', (22000, 60000)),
+    'USA': ('${low} - ${high} a year', ',', (60000, 180000)),
+}
+
+
+def synthetic_salaries(rows: int, seed: int = 0, distinct: Optional[int] = None,
+                       missing_rate: float = 0.0) -> pd.DataFrame:
+    '''
+    Return a frame of country and salary range strings in each country's
+    format. With distinct, each country's salaries are drawn from that many
+    bands, as on Indeed where the same bands are posted over and over; a
+    missing_rate fraction of salaries is 'Not available'.
+    '''
+    rng = np.random.default_rng(seed)
+    countries = rng.choice(list(SYNTHETIC_SALARY_FORMATS), size=rows)
+    salaries = np.empty(rows, dtype=object)
+    for country, (template, separator, (low, high)) in SYNTHETIC_SALARY_FORMATS.items():
+        mask = countries == country
+        bands = distinct or mask.sum()
+        lows = rng.integers(low, high, size=bands) // 100 * 100
+        highs = lows + rng.integers(0, 40, size=bands) * 500
+        band_salaries = np.array([template.format(low=f'{low:,}'.replace(',', separator),
+                                                  high=f'{high:,}'.replace(',', separator))
+                                  for low, high in zip(lows.tolist(), highs.tolist())], dtype=object)
+        salaries[mask] = band_salaries[rng.integers(0, bands, size=mask.sum())] if distinct else band_salaries
+    if missing_rate:
+        salaries[rng.random(rows) < missing_rate] = 'Not available'
+    return pd.DataFrame({'country': countries, 'salary': salaries})
+
+
+def _compare_salary_parsers(name: str, country: str, s: pd.Series, repeat: int) -> Dict:
+    timings, parsed = {}, {}
+    for label, parse in (('legacy', LEGACY_SALARY_PARSERS[country]),
+                         ('vectorized', SALARY_PARSERS[country])):
+        runs = []
+        # The first call also pays one-off setup (regex compilation), so it
+        # only counts when it is the only run
+        for _ in range(repeat + 1 if repeat > 1 else 1):
+            start = time.perf_counter()
+            parsed[label] = parse(s)
+            runs.append(time.perf_counter() - start)
+        timings[label] = min(runs[1:] or runs)
+    identical = all(np.allclose(parsed['legacy'][column].astype(float), parsed['vectorized'][column],
+                                equal_nan=True)
+                    for column in ('min_salary', 'max_salary'))
+    return {'dataset': name, 'country': country, 'rows': len(s),
+            'legacy_s': timings['legacy'], 'vectorized_s': timings['vectorized'],
+            'speedup': timings['legacy'] / timings['vectorized'], 'identical': identical}
+
+
+def benchmark_salary_parsing(csv_paths: Sequence[str], synthetic_rows: int = 1_000_000,
+                             repeat: int = 3) -> List[Dict]:
+    '''
+    Time the per-row and vectorized salary parsers per country on the
+    salaries of scraped datasets and of synthetic_rows generated rows, and
+    check that both give the same amounts. Each timing is the best of
+    repeat runs after a warm-up run. On the scraped datasets, which have a
+    few dozen salaries per country, both parsers take about a millisecond
+    or less, fixed per-call overhead dominates and the speedup is modest
+    (about 1.3-1.8x); the gain shows on large inputs.
+    '''
+    datasets = [(path, pd.read_csv(path, usecols=['country', 'salary'])) for path in csv_paths]
+    if synthetic_rows:
+        datasets.append((f'synthetic ({synthetic_rows:,} rows)', synthetic_salaries(synthetic_rows)))
+    results = []
+    for name, df in datasets:
+        df = df[valid_salary_mask(df['salary'])]
+        for country, salaries in df.groupby('country')['salary']:
+            # A single run is enough to time the synthetic frame
+            results.append(_compare_salary_parsers(name, country, salaries.str.lower(),
+                                                   1 if len(salaries) > 100_000 else repeat))
+    return results
+
+
+def _time_normalization(df: pd.DataFrame, parse_cache: Optional[SalaryParseCache] = None) -> Dict:
+    enable_metrics()
+    try:
+        start = time.perf_counter()
+        normalize_salaries(df, parse_cache=parse_cache)
+        seconds = time.perf_counter() - start
+        counters = METRICS.counters()
+    finally:
+        disable_metrics()
+    return {'seconds': seconds, 'salary_rows': counters.get('salary_rows', 0),
+            'strings_parsed': counters.get('salary_strings_parsed', 0)}
+
+
+def benchmark_salary_normalization(csv_paths: Sequence[str], synthetic_rows: int = 1_000_000,
+                                   distinct: int = 2_000, missing_rate: float = 0.5) -> List[Dict]:
+    '''
+    Compare parsing every salary row with the parse-once normalization on
+    the scraped datasets combined and on a synthetic frame drawing each
+    country's salaries from `distinct` bands, without and with a parse cache
+    carried over from a previous run.
+    '''
+    datasets = []
+    if csv_paths:
+        datasets.append(('scraped datasets', pd.concat(
+            [pd.read_csv(path, usecols=['country', 'salary']) for path in csv_paths],
+            ignore_index=True)))
+    if synthetic_rows:
+        datasets.append((f'synthetic ({synthetic_rows:,} rows, {distinct:,} bands per country)',
+                         synthetic_salaries(synthetic_rows, distinct=distinct,
+                                            missing_rate=missing_rate)))
+    results = []
+    for name, df in datasets:
+        salaries = df[valid_salary_mask(df['salary'])]
+        start = time.perf_counter()
+        for country, country_salaries in salaries.groupby('country')['salary']:
+            SALARY_PARSERS[country](country_salaries.str.lower())
+        per_row = time.perf_counter() - start
+
+        memoized = _time_normalization(df)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, 'salary_cache.sqlite')
+            with SalaryParseCache(cache_path, SALARY_PARSER_VERSION) as parse_cache:
+                cold = _time_normalization(df, parse_cache)
+            with SalaryParseCache(cache_path, SALARY_PARSER_VERSION) as parse_cache:
+                warm = _time_normalization(df, parse_cache)
+        results.append({'dataset': name, 'rows': len(df), 'salary_rows': memoized['salary_rows'],
+                        'per_row_parse_s': per_row, 'normalize_s': memoized['seconds'],
+                        'strings_parsed': memoized['strings_parsed'],
+                        'parsed_fraction': memoized['strings_parsed'] / max(memoized['salary_rows'], 1),
+                        'cold_cache_s': cold['seconds'], 'warm_cache_s': warm['seconds'],
+                        'warm_cache_strings_parsed': warm['strings_parsed']})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Scraper benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    cards_parser = subparsers.add_parser('cards', help='Card extraction over saved results pages')
+    cards_parser.add_argument('html_paths', nargs='+')
+    cards_parser.add_argument('--repeat', type=int, default=5)
+
+    profiles_parser = subparsers.add_parser('profiles', help='Latency and memory per browser profile')
+    profiles_parser.add_argument('urls', nargs='+')
+    profiles_parser.add_argument('--profiles', nargs='+', choices=list(scraper.BROWSER_PROFILES))
+
+    throughput_parser = subparsers.add_parser(
+        'throughput', help='Scraper throughput and failure recovery against a local Indeed stand-in')
+    throughput_parser.add_argument('--backends', nargs='+', choices=['http', 'browser'],
+                                   default=['http'])
+    throughput_parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    throughput_parser.add_argument('--jobs-per-search', type=int, default=45)
+    throughput_parser.add_argument('--latency', type=float, default=0.05,
+                                   help='Stand-in response time in seconds')
+    throughput_parser.add_argument('--error-rate', type=float, default=0.0)
+    throughput_parser.add_argument('--block-rate', type=float, default=0.0)
+    throughput_parser.add_argument('--extractor', choices=['xpath', 'embedded'], default='xpath')
+
+    salaries_parser = subparsers.add_parser(
+        'salaries', help='Per-row vs vectorized salary parsing on datasets and synthetic rows')
+    salaries_parser.add_argument('csv_paths', nargs='*',
+                                 help='Scraped datasets, e.g. data/indeed_jobs_*.csv')
+    salaries_parser.add_argument('--synthetic-rows', type=int, default=1_000_000)
+    salaries_parser.add_argument('--repeat', type=int, default=3)
+
+    normalize_parser = subparsers.add_parser(
+        'normalize', help='Parse-once salary normalization and parse cache on datasets and synthetic rows')
+    normalize_parser.add_argument('csv_paths', nargs='*',
+                                  help='Scraped datasets, e.g. data/indeed_jobs_*.csv')
+    normalize_parser.add_argument('--synthetic-rows', type=int, default=1_000_000)
+    normalize_parser.add_argument('--distinct', type=int, default=2_000,
+                                  help='Distinct synthetic salary bands per country')
+
+    args = parser.parse_args()
+    if args.benchmark == 'cards':
+        _print_results(benchmark_card_extraction(args.html_paths, args.repeat))
+    elif args.benchmark == 'profiles':
+        for results in benchmark_browser_profiles(args.urls, args.profiles):
+            _print_results(results)
+            print()
+    elif args.benchmark == 'throughput':
+        config = StandinConfig(args.jobs_per_search, args.latency, latency_jitter=args.latency,
+                               error_rate=args.error_rate, block_rate=args.block_rate)
+        for results in benchmark_scrape_throughput(args.backends, args.workers, config,
+                                                   extractor=args.extractor):
+            _print_results(results)
+            print()
+    elif args.benchmark == 'salaries':
+        for results in benchmark_salary_parsing(args.csv_paths, args.synthetic_rows, args.repeat):
+            _print_results(results)
+            print()
+    elif args.benchmark == 'normalize':
+        for results in benchmark_salary_normalization(args.csv_paths, args.synthetic_rows,
+                                                      args.distinct):
+            _print_results(results)
+            print()
+
+
+def _print_results(results: Dict) -> None:
+    for key, value in results.items():
+        print(f'{key}: {value:.3f}' if isinstance(value, float) else f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Checkpoint store for resumable scraping runs.
+Records completed searches, (keyword, location, page) units and emitted
+job keys in SQLite so a restarted scrape_jobs run can pick up where it stopped.
+scrape_jobs clears the store once every search of the run is done.
+"""
+
+# Standard library imports
+import sqlite3
+import threading
+from typing import Set, Tuple
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS searches (
+    job_keyword TEXT NOT NULL,
+    location_keyword TEXT NOT NULL,
+    PRIMARY KEY (job_keyword, location_keyword)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    job_keyword TEXT NOT NULL,
+    location_keyword TEXT NOT NULL,
+    page_no INTEGER NOT NULL,
+    PRIMARY KEY (job_keyword, location_keyword, page_no)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_keyword TEXT NOT NULL,
+    location_keyword TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    PRIMARY KEY (job_keyword, location_keyword, job_key)
+);
+'''
+
+
+class CheckpointStore:
+    '''
+    Persistent record of scraping progress for one output file.
+
+    Every mark_* call is committed immediately, so the store never claims
+    more progress than was made. Lookups are served from memory and the
+    store can be shared between worker threads.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._searches: Set[Tuple[str, str]] = set(
+            self._conn.execute('SELECT job_keyword, location_keyword FROM searches'))
+        self._pages: Set[Tuple[str, str, int]] = set(
+            self._conn.execute('SELECT job_keyword, location_keyword, page_no FROM pages'))
+        self._jobs: Set[Tuple[str, str, str]] = set(
+            self._conn.execute('SELECT job_keyword, location_keyword, job_key FROM jobs'))
+        if self._pages or self._jobs:
+            print(f'Resuming from checkpoint {path}: '
+                  f'{len(self._pages)} pages and {len(self._jobs)} jobs already done')
+
+    def __enter__(self) -> 'CheckpointStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def is_search_done(self, job_keyword: str, location_keyword: str) -> bool:
+        '''Check whether every page of a search was processed.'''
+        return (job_keyword, location_keyword) in self._searches
+
+    def mark_search_done(self, job_keyword: str, location_keyword: str) -> None:
+        '''Record a search as fully processed.'''
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO searches VALUES (?, ?)',
+                               (job_keyword, location_keyword))
+            self._conn.commit()
+            self._searches.add((job_keyword, location_keyword))
+
+    def is_page_done(self, job_keyword: str, location_keyword: str, page_no: int) -> bool:
+        '''Check whether a results page was fully processed.'''
+        return (job_keyword, location_keyword, page_no) in self._pages
+
+    def mark_page_done(self, job_keyword: str, location_keyword: str, page_no: int) -> None:
+        '''Record a results page as fully processed.'''
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO pages VALUES (?, ?, ?)',
+                               (job_keyword, location_keyword, page_no))
+            self._conn.commit()
+            self._pages.add((job_keyword, location_keyword, page_no))
+
+    def is_job_done(self, job_keyword: str, location_keyword: str, job_key: str) -> bool:
+        '''Check whether a job was already written for this search.'''
+        return (job_keyword, location_keyword, job_key) in self._jobs
+
+    def mark_job_done(self, job_keyword: str, location_keyword: str, job_key: str) -> None:
+        '''Record a job as written for this search.'''
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO jobs VALUES (?, ?, ?)',
+                               (job_keyword, location_keyword, job_key))
+            self._conn.commit()
+            self._jobs.add((job_keyword, location_keyword, job_key))
+
+    def reset(self) -> None:
+        '''Forget all recorded progress, so the next run starts from scratch.'''
+        with self._lock:
+            self._conn.executescript('DELETE FROM searches; DELETE FROM pages; DELETE FROM jobs;')
+            self._searches.clear()
+            self._pages.clear()
+            self._jobs.clear()
+
+    def close(self) -> None:
+        '''Close the underlying database connection.'''
+        with self._lock:
+            self._conn.close()
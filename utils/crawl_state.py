@@ -0,0 +1,103 @@
+"""
+Crawl state for incremental refreshes.
+Records when each (country, keyword, location) search last completed, so
+the next run can request only postings published since then, and loads
+the job keys already present in an output dataset.
+"""
+
+# Standard library imports
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+# Third-party library imports
+import pandas as pd
+
+# Local imports
+from utils.web_scraping_utils import get_job_key
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS crawls (
+    country TEXT NOT NULL,
+    job_keyword TEXT NOT NULL,
+    location_keyword TEXT NOT NULL,
+    last_crawl REAL NOT NULL,
+    PRIMARY KEY (country, job_keyword, location_keyword)
+);
+'''
+
+# Posting age filters offered by Indeed's fromage parameter, in days
+MAX_AGE_DAYS = (1, 3, 7, 14)
+
+
+class CrawlState:
+    '''
+    Persistent last successful crawl time per search.
+
+    Unlike CheckpointStore, which tracks progress within one run, the crawl
+    state carries over between runs and is only updated once a search has
+    been brought up to date.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._last_crawls: Dict[Tuple[str, str, str], float] = {
+            (country, job_keyword, location_keyword): last_crawl
+            for country, job_keyword, location_keyword, last_crawl
+            in self._conn.execute('SELECT * FROM crawls')}
+
+    def __enter__(self) -> 'CrawlState':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def last_crawl(self, country: str, job_keyword: str, location_keyword: str) -> Optional[float]:
+        '''Return the epoch time of the last completed crawl of a search, if any.'''
+        return self._last_crawls.get((country, job_keyword, location_keyword))
+
+    def max_age_days(self, country: str, job_keyword: str, location_keyword: str,
+                     now: Optional[float] = None) -> Optional[int]:
+        '''
+        Return the smallest Indeed age filter covering every posting since
+        the last crawl, or None if the search was never crawled or the last
+        crawl is older than the widest filter.
+        '''
+        last_crawl = self.last_crawl(country, job_keyword, location_keyword)
+        if last_crawl is None:
+            return None
+        days = math.ceil(((now or time.time()) - last_crawl) / 86400)
+        return next((max_age for max_age in MAX_AGE_DAYS if max_age >= days), None)
+
+    def mark_crawled(self, country: str, job_keyword: str, location_keyword: str,
+                     crawled_at: float) -> None:
+        '''Record that a search is up to date as of crawled_at.'''
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO crawls VALUES (?, ?, ?, ?)',
+                               (country, job_keyword, location_keyword, crawled_at))
+            self._conn.commit()
+            self._last_crawls[(country, job_keyword, location_keyword)] = crawled_at
+
+    def close(self) -> None:
+        '''Close the underlying database connection.'''
+        with self._lock:
+            self._conn.close()
+
+
+def load_job_keys(path: str) -> Set[str]:
+    '''Return the job keys of the rows in a CSV, JSON Lines or Parquet dataset.'''
+    if not os.path.exists(path):
+        return set()
+    if path.endswith('.parquet'):
+        job_links = pd.read_parquet(path, columns=['job_link'])['job_link']
+    elif path.endswith('.jsonl'):
+        job_links = pd.read_json(path, lines=True)['job_link']
+    else:
+        job_links = pd.read_csv(path, usecols=['job_link'])['job_link']
+    return {get_job_key(job_link) for job_link in job_links.dropna()}
@@ -0,0 +1,204 @@
+"""
+Two-phase crawling: a fast results-page sweep followed by prioritized
+detail-page fetching.
+The sweep writes a record for every job card straight away, with whatever
+detail fields are already known, and submits jobs lacking details to a
+priority queue. Detail workers drain the queue concurrently with the
+sweep, new postings and postings without a salary first, and write the
+fetched fields to a separate details output that merge_details joins back
+onto the card records. A resumed run re-queues the records whose details
+never made it to the details output (see pending_details).
+"""
+
+# Standard library imports
+import heapq
+import itertools
+import threading
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+# Third-party library imports
+import pandas as pd
+
+# Local imports
+import utils.web_scraping_utils as scraper
+from utils.metrics import METRICS
+
+# Columns of the details output written by the detail phase
+DETAIL_COLUMNS = ['job_link', 'salary', 'job_description']
+
+
+class DetailQueue:
+    '''
+    Thread-safe priority queue of job links whose detail pages should be loaded.
+
+    Jobs whose description and salary are both known are not queued, and
+    each job key is queued at most once. Jobs not in known_jobs (e.g. the
+    seen-jobs index) come before known ones, and within each group jobs
+    with a missing salary come first; ties are served in submission order.
+    Once max_fetches jobs have been handed out, the rest are left as they
+    are in the card records.
+    '''
+
+    def __init__(self, known_jobs: Optional[Container[str]] = None,
+                 max_fetches: Optional[int] = None):
+        self.known_jobs = known_jobs
+        self.max_fetches = max_fetches
+        self.fetches = 0
+        self._heap: List[Tuple[Tuple[bool, bool], int, str]] = []
+        self._queued = set()
+        self._counter = itertools.count()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def priority(self, job_key: str, details: Dict[str, str]) -> Tuple[bool, bool]:
+        '''Return the sort key of a job; lower is fetched sooner.'''
+        known = self.known_jobs is not None and job_key in self.known_jobs
+        return known, details['salary'] != 'Not available'
+
+    def submit(self, job_link: str, details: Dict[str, str]) -> bool:
+        '''Queue a job link unless its details are complete; returns whether it was queued.'''
+        if 'Not available' not in details.values():
+            return False
+        job_key = scraper.get_job_key(job_link)
+        with self._condition:
+            if job_key in self._queued:
+                return False
+            self._queued.add(job_key)
+            heapq.heappush(self._heap, (self.priority(job_key, details),
+                                        next(self._counter), job_link))
+            self._condition.notify()
+        METRICS.incr('details_queued')
+        return True
+
+    def get_batch(self, size: int) -> List[str]:
+        '''
+        Wait for queued job links and return up to size of them, highest
+        priority first. Returns an empty list once the queue is closed and
+        drained, or the fetch budget is spent.
+        '''
+        with self._condition:
+            while not self._heap and not self._closed and not self._budget_spent():
+                self._condition.wait()
+            if self.max_fetches is not None:
+                size = min(size, self.max_fetches - self.fetches)
+            batch = [heapq.heappop(self._heap)[2] for _ in range(min(size, len(self._heap)))]
+            self.fetches += len(batch)
+            return batch
+
+    def _budget_spent(self) -> bool:
+        return self.max_fetches is not None and self.fetches >= self.max_fetches
+
+    def close(self) -> None:
+        '''Signal that no more jobs will be submitted.'''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def run_detail_worker(queue: DetailQueue, backend, details_writer, write_lock: threading.Lock,
+                      batch_size: int = 8, seen_jobs=None) -> None:
+    '''
+    Fetch batches of detail pages from the queue and write their fields.
+    Pages that fail to load are not written, so a resumed run queues them
+    again.
+    '''
+    while True:
+        job_links = queue.get_batch(batch_size)
+        if not job_links:
+            return
+        try:
+            with METRICS.timer('detail_phase_batch'):
+                jobs_details, loaded = scraper.fetch_jobs_details(job_links, backend=backend)
+        except Exception as e:
+            print(f'Error fetching job details: {e}')
+            METRICS.incr('detail_phase_failures', len(job_links))
+            continue
+        fetched = [(job_link, details)
+                   for job_link, details, ok in zip(job_links, jobs_details, loaded) if ok]
+        with write_lock:
+            for job_link, details in fetched:
+                details_writer.writerow([job_link, details['salary'], details['job_description']])
+        for job_link, details in fetched:
+            if seen_jobs is not None:
+                seen_jobs.add(scraper.get_job_key(job_link), details)
+        METRICS.incr('details_fetched', len(fetched))
+        METRICS.incr('detail_phase_failures', len(job_links) - len(fetched))
+
+
+def scrape_jobs_two_phase(csv_writer, details_writer, job_keywords: List[str],
+                          location_keywords: List[str], selected_country: str, base_url: str,
+                          backend, max_workers: int = 1, detail_workers: int = 2,
+                          detail_batch: int = 8, max_detail_fetches: Optional[int] = None,
+                          seen_jobs=None, known_jobs=None,
+                          pending: Iterable[Tuple[str, Dict[str, str]]] = (),
+                          **scrape_kwargs) -> DetailQueue:
+    '''
+    Run scrape_jobs as a card sweep writing to csv_writer while detail
+    workers fetch queued detail pages through the same backend and write
+    DETAIL_COLUMNS rows to details_writer. pending holds the (job link,
+    known fields) of records written by an earlier run, as returned by
+    pending_details; they are queued before the sweep starts. Returns the
+    queue, whose length is the number of jobs left unfetched when a fetch
+    budget is set. Other keyword arguments (checkpoint, crawl_state,
+    extractor) are passed to scrape_jobs.
+    '''
+    queue = DetailQueue(known_jobs if known_jobs is not None else seen_jobs, max_detail_fetches)
+    requeued = sum(queue.submit(job_link, details) for job_link, details in pending)
+    if requeued:
+        print(f'Detail phase: {requeued} jobs of an earlier run queued again')
+    write_lock = threading.Lock()
+    workers = [threading.Thread(target=run_detail_worker,
+                                args=(queue, backend, details_writer, write_lock,
+                                      detail_batch, seen_jobs), daemon=True)
+               for _ in range(detail_workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        scraper.scrape_jobs(csv_writer, None, job_keywords, location_keywords, selected_country,
+                            base_url, backend=backend, max_workers=max_workers,
+                            seen_jobs=seen_jobs, known_jobs=known_jobs,
+                            detail_queue=queue, **scrape_kwargs)
+    finally:
+        queue.close()
+        for worker in workers:
+            worker.join()
+    print(f'Detail phase: {queue.fetches} detail pages fetched, {len(queue)} left unfetched')
+    return queue
+
+
+def merge_details(records: pd.DataFrame, details: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Fill the salary and job_description of card records from a details
+    output, matching jobs by job key. Fetched values replace missing ones
+    and description snippets; the latest row per job wins.
+    '''
+    details = details.assign(job_key=details['job_link'].map(scraper.get_job_key))
+    details = details.drop_duplicates('job_key', keep='last').set_index('job_key')
+    job_keys = records['job_link'].map(scraper.get_job_key)
+    merged = records.copy()
+    for column in ('salary', 'job_description'):
+        fetched = job_keys.map(details[column])
+        use_fetched = fetched.notna() & (fetched != 'Not available')
+        merged[column] = merged[column].where(~use_fetched, fetched)
+    return merged
+
+
+def pending_details(records: pd.DataFrame,
+                    details: Optional[pd.DataFrame] = None) -> List[Tuple[str, Dict[str, str]]]:
+    '''
+    Return the job links and known fields of card records still waiting for
+    their detail page: records without a description whose job has no row
+    in the details output. The checkpoint counts a job as done once its
+    card record is written, so a resumed run re-queues these instead.
+    '''
+    fields = records[DETAIL_COLUMNS[1:]].fillna('Not available').astype(str)
+    waiting = fields['job_description'] == 'Not available'
+    if details is not None and len(details):
+        fetched = set(details['job_link'].map(scraper.get_job_key))
+        waiting &= ~records['job_link'].map(scraper.get_job_key).isin(fetched)
+    return [(job_link, fields.loc[index].to_dict())
+            for index, job_link in records.loc[waiting, 'job_link'].items()]
@@ -34,6 +34,33 @@ COUNTRY_CODE_MAP = {
    'USA': 'USA'
 }
 
+# Scraping configuration: search keywords and per-country base URLs and cities
+JOB_SEARCH_KEYWORDS = [
+   'Data+Analyst',
+   'Data+Scientist',
+   'Product+Analyst',
+   'BI+Analyst'
+]
+
+COUNTRY_CONFIGS = {
+   'USA': {
+       'base_url': 'https://www.indeed.com',
+       'cities': ['New+York, NY', 'Los+Angeles, CA', 'Chicago, IL']
+   },
+   'France': {
+       'base_url': 'https://www.indeed.fr',
+       'cities': ['Paris (75)', 'Marseille (13)', 'Lyon (69)']
+   },
+   'Italy': {
+       'base_url': 'https://it.indeed.com',
+       'cities': ['Roma, Lazio', 'Milano, Lombardia', 'Napoli, Campania']
+   },
+   'Sweden': {
+       'base_url': 'https://se.indeed.com',
+       'cities': ['Stockholm', 'Göteborg', 'Malmö']
+   }
+}
+
 # Salary and time-related mappings
 TIME_PERIOD_MAP = {
    'hour': 160,
@@ -0,0 +1,268 @@
+"""
+Managed pool of Firefox WebDriver instances for parallel scraping.
+Drivers are checked out by one worker at a time, health-checked on
+checkout and checkin, and replaced when they stop responding. Pages that
+fail because of the browser are retried on a fresh driver, and drivers
+are recycled after a number of pages or above a memory threshold.
+"""
+
+# Standard library imports
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Third-party library imports
+from lxml import etree as et
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Local imports
+from utils.metrics import METRICS
+from utils.page_cache import PageCache, fetch_through_cache
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.web_scraping_utils import fetch_page_source, initialize_driver, parse_dom
+
+
+def is_driver_alive(driver: webdriver.Firefox) -> bool:
+    '''Check whether a WebDriver session still responds.'''
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def get_driver_rss(driver: webdriver.Firefox) -> Optional[int]:
+    '''
+    Return the resident memory in bytes of a driver's geckodriver and
+    Firefox processes, or None if psutil is not installed.
+    '''
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process] + process.children(recursive=True)
+        return sum(proc.memory_info().rss for proc in processes)
+    except (AttributeError, psutil.Error):
+        return None
+
+
+def quit_driver(driver: webdriver.Firefox) -> None:
+    '''Quit a WebDriver, ignoring errors from an already dead browser.'''
+    try:
+        driver.quit()
+    except WebDriverException as e:
+        print('Error quitting WebDriver:', e)
+
+
+class DriverPool:
+    '''
+    Pool of up to `size` browsers shared between worker threads.
+
+    Browsers are started lazily by driver_factory, by default
+    initialize_driver with the named browser profile. The pool also acts as a
+    fetch backend for scrape_jobs: get_dom checks out a browser for one
+    page load, and get_doms spreads a batch of URLs across all browsers.
+    Page loads from all browsers are paced by the shared rate_limiter, and
+    go through the optional page cache; in replay mode no browser is started.
+
+    A page load that raises a WebDriverException is retried up to
+    max_retries times, each time on a newly started browser. A browser is
+    quit and replaced once it has served recycle_after_pages pages or its
+    processes use more than max_rss_bytes (needs psutil); either limit is
+    disabled when None. pages_served() reports the pages loaded per browser.
+    Browsers started by the caller can be handed to the pool with adopt();
+    close() leaves them running.
+    '''
+
+    def __init__(self, size: int = 2,
+                 driver_factory: Optional[Callable[[], webdriver.Firefox]] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 cache: Optional[PageCache] = None, profile: str = 'default',
+                 max_retries: int = 2, recycle_after_pages: Optional[int] = 500,
+                 max_rss_bytes: Optional[int] = None):
+        self.size = size
+        self.profile = profile
+        self.driver_factory = driver_factory or partial(initialize_driver, profile)
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.cache = cache
+        self.max_retries = max_retries
+        self.recycle_after_pages = recycle_after_pages
+        self.max_rss_bytes = max_rss_bytes
+        self._idle: queue.Queue = queue.Queue()
+        self._drivers: List[webdriver.Firefox] = []
+        self._started = 0
+        self._driver_ids: Dict[int, int] = {}
+        self._pages: Dict[int, int] = {}
+        self._adopted = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> 'DriverPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _discard(self, driver: webdriver.Firefox, reason: str = 'restart') -> None:
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+                self._started -= 1
+            driver_id = self._driver_ids.pop(id(driver), None)
+            self._adopted.discard(id(driver))
+            pages = self._pages.get(driver_id, 0)
+        METRICS.incr('driver_restarts' if reason == 'restart' else 'driver_recycles')
+        print(f'Quitting WebDriver {driver_id} ({reason}) after {pages} pages')
+        quit_driver(driver)
+        # Wake a worker blocked in checkout so it can start a replacement
+        self._idle.put(None)
+
+    def _start_driver(self) -> webdriver.Firefox:
+        try:
+            with METRICS.timer('driver_start'):
+                driver = self.driver_factory()
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+        self._register(driver)
+        return driver
+
+    def _register(self, driver: webdriver.Firefox) -> None:
+        with self._lock:
+            self._drivers.append(driver)
+            self._driver_ids[id(driver)] = driver_id = len(self._pages) + 1
+            self._pages[driver_id] = 0
+
+    def adopt(self, driver: webdriver.Firefox) -> None:
+        '''
+        Add a browser started by the caller to the pool. It counts towards
+        size and is replaced like any other if it fails, but close() does
+        not quit it.
+        '''
+        with self._lock:
+            self._started += 1
+            self._adopted.add(id(driver))
+        self._register(driver)
+        self._idle.put(driver)
+
+    def _recycle_reason(self, driver: webdriver.Firefox) -> Optional[str]:
+        with self._lock:
+            pages = self._pages.get(self._driver_ids.get(id(driver)), 0)
+        if self.recycle_after_pages is not None and pages >= self.recycle_after_pages:
+            return 'page limit'
+        if self.max_rss_bytes is not None:
+            rss = get_driver_rss(driver)
+            if rss is not None and rss > self.max_rss_bytes:
+                return f'memory {rss / 1024 ** 2:.0f} MB'
+        return None
+
+    def checkout(self, timeout: Optional[float] = None) -> webdriver.Firefox:
+        '''Take a healthy browser from the pool, starting one if below size.'''
+        while True:
+            if self._closed:
+                raise RuntimeError('DriverPool is closed')
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_start = self._started < self.size
+                    if can_start:
+                        self._started += 1
+                if can_start:
+                    return self._start_driver()
+                driver = self._idle.get(timeout=timeout)
+            if driver is None:
+                continue
+            if is_driver_alive(driver):
+                return driver
+            print('Replacing unresponsive WebDriver')
+            self._discard(driver)
+
+    def checkin(self, driver: webdriver.Firefox) -> None:
+        '''
+        Return a browser to the pool, discarding it if it is unhealthy and
+        recycling it if it reached the page or memory limit.
+        '''
+        if self._closed or not is_driver_alive(driver):
+            self._discard(driver)
+            return
+        reason = self._recycle_reason(driver)
+        if reason is not None:
+            self._discard(driver, f'recycle: {reason}')
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None) -> Iterator[webdriver.Firefox]:
+        '''Check out a browser for the duration of a with-block.'''
+        driver = self.checkout(timeout)
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    def _load_page_source(self, url: str) -> Optional[str]:
+        for attempt in range(self.max_retries + 1):
+            driver = self.checkout()
+            try:
+                page_content = fetch_page_source(url, driver, self.rate_limiter,
+                                                 raise_errors=True)
+            except WebDriverException:
+                # The browser may be wedged even if it still answers; replace it
+                self._discard(driver)
+                if attempt < self.max_retries:
+                    METRICS.incr('page_retries')
+                    print(f'Retrying {url} on a fresh WebDriver')
+                continue
+            with self._lock:
+                driver_id = self._driver_ids.get(id(driver))
+                if driver_id is not None:
+                    self._pages[driver_id] += 1
+            self.checkin(driver)
+            return page_content
+        print(f'Giving up on {url} after {self.max_retries + 1} attempts')
+        return None
+
+    def get_page_source(self, url: str) -> Optional[str]:
+        '''Return a URL's page source from the cache or a pooled browser.'''
+        return fetch_through_cache(url, self.cache, self._load_page_source)
+
+    def get_dom(self, url: str) -> Optional[et._Element]:
+        '''Load a URL on a pooled browser and return its DOM.'''
+        page_content = self.get_page_source(url)
+        return parse_dom(page_content) if page_content is not None else None
+
+    def get_doms(self, urls: List[str]) -> List[Optional[et._Element]]:
+        '''Load several URLs across the pooled browsers, preserving order.'''
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(self.get_dom, urls))
+
+    def pages_served(self) -> Dict[int, int]:
+        '''Return the number of pages loaded by each browser started so far.'''
+        with self._lock:
+            return dict(self._pages)
+
+    def close(self) -> None:
+        '''Quit every browser started by the pool and print the pages each served.'''
+        self._closed = True
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            adopted, self._adopted = self._adopted, set()
+            self._started = 0
+        for driver in drivers:
+            if id(driver) not in adopted:
+                quit_driver(driver)
+        pages = self.pages_served()
+        if pages:
+            print('Pages served per WebDriver: '
+                  + ', '.join(f'#{driver_id}: {count}' for driver_id, count in pages.items()))
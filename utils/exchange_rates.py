@@ -0,0 +1,184 @@
+"""
+Exchange rates to EUR for salary conversion.
+Rates come from the Frankfurter API (ECB reference rates), fetched for all
+needed currencies in one request and cached on disk: latest rates for a
+configurable time to live, rates of past dates for good. When the API
+can't be reached, the last known rate of each currency is used. The base
+URL (or the FRANKFURTER_URL environment variable) can point to a local
+stub for offline tests.
+"""
+
+# Standard library imports
+import bisect
+import datetime as dt
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Third-party library imports
+import requests
+
+FRANKFURTER_URL = os.environ.get('FRANKFURTER_URL', 'https://api.frankfurter.app')
+
+# Latest rates are stored under this date, past rates under their ISO date
+LATEST = 'latest'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rates (
+    rate_date TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    eur_rate REAL NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (rate_date, currency)
+);
+'''
+
+# Past dates to request before the first needed date, so weekend and
+# holiday dates can take the rate of the previous business day
+LOOKBACK_DAYS = 7
+
+
+class ExchangeRateProvider:
+    '''
+    EUR exchange rates with an on-disk cache.
+
+    Rates are EUR per unit of a currency, so amounts convert by
+    multiplication. Latest rates are fetched again once older than ttl
+    seconds. If a request fails, the last known rate of each currency is
+    used with a warning; a RuntimeError is raised only for a currency that
+    was never fetched. With cache_path=None the cache is kept in memory.
+    '''
+
+    def __init__(self, cache_path: Optional[str] = 'exchange_rates.sqlite',
+                 base_url: str = FRANKFURTER_URL, ttl: float = 12 * 3600, timeout: float = 10.0,
+                 session: Optional[requests.Session] = None):
+        self.cache_path = cache_path
+        self.base_url = base_url.rstrip('/')
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path or ':memory:', check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self) -> 'ExchangeRateProvider':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def latest(self, currencies: Iterable[str]) -> Dict[str, float]:
+        '''Return the latest EUR rate of each currency.'''
+        currencies = _foreign(currencies)
+        with self._lock:
+            rates = {currency: eur_rate for currency, eur_rate in self._conn.execute(
+                'SELECT currency, eur_rate FROM rates WHERE rate_date = ? AND fetched_at >= ?',
+                (LATEST, time.time() - self.ttl)) if currency in currencies}
+        missing = [currency for currency in currencies if currency not in rates]
+        if missing:
+            data = self._fetch(LATEST, missing)
+            if data is not None:
+                fetched = _eur_rates(data['rates'])
+                self._store({LATEST: fetched, data['date']: fetched})
+                rates.update(fetched)
+        return self._with_last_known(rates, currencies)
+
+    def historical(self, currencies: Iterable[str],
+                   dates: Iterable[dt.date]) -> Dict[dt.date, Dict[str, float]]:
+        '''
+        Return the EUR rate of each currency on each date. A date without a
+        reference rate (weekend, holiday) takes the previous business day's;
+        today and later dates take the latest rates.
+        '''
+        currencies = _foreign(currencies)
+        dates = sorted(set(dates))
+        today = dt.date.today()
+        past = [date for date in dates if date < today]
+        rates = {date: {} for date in dates}
+        if past:
+            with self._lock:
+                for rate_date, currency, eur_rate in self._conn.execute(
+                        'SELECT rate_date, currency, eur_rate FROM rates WHERE rate_date BETWEEN ? AND ?',
+                        (past[0].isoformat(), past[-1].isoformat())):
+                    date = dt.date.fromisoformat(rate_date)
+                    if date in rates and currency in currencies:
+                        rates[date][currency] = eur_rate
+        missing = [date for date in past if len(rates[date]) < len(currencies)]
+        if missing:
+            start = missing[0] - dt.timedelta(days=LOOKBACK_DAYS)
+            data = self._fetch(f'{start.isoformat()}..{missing[-1].isoformat()}', currencies)
+            if data is not None:
+                published = sorted((dt.date.fromisoformat(rate_date), _eur_rates(day_rates))
+                                   for rate_date, day_rates in data['rates'].items())
+                published_dates = [date for date, _ in published]
+                fetched = {}
+                for date in missing:
+                    position = bisect.bisect_right(published_dates, date)
+                    if position:
+                        fetched[date.isoformat()] = published[position - 1][1]
+                        rates[date].update(published[position - 1][1])
+                self._store(fetched)
+        current = [date for date in dates if date >= today]
+        if current:
+            latest = self.latest(currencies)
+            for date in current:
+                rates[date] = dict(latest)
+        return {date: self._with_last_known(date_rates, currencies)
+                for date, date_rates in rates.items()}
+
+    def _fetch(self, path: str, currencies: List[str]) -> Optional[Dict]:
+        '''Request EUR-based rates of several currencies; None if the request fails.'''
+        try:
+            self.requests += 1
+            response = self.session.get(f'{self.base_url}/{path}',
+                                        params={'from': 'EUR', 'to': ','.join(currencies)},
+                                        timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f'Error fetching exchange rates for {", ".join(currencies)} ({path}): {e}; '
+                  'using last known rates')
+            return None
+
+    def _store(self, rates_by_date: Dict[str, Dict[str, float]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO rates VALUES (?, ?, ?, ?)',
+                                   [(rate_date, currency, eur_rate, now)
+                                    for rate_date, rates in rates_by_date.items()
+                                    for currency, eur_rate in rates.items()])
+            self._conn.commit()
+
+    def _with_last_known(self, rates: Dict[str, float], currencies: List[str]) -> Dict[str, float]:
+        '''Fill in missing currencies with their most recently fetched rate and add EUR.'''
+        rates = dict(rates)
+        for currency in currencies:
+            if currency in rates:
+                continue
+            with self._lock:
+                # Latest fetches are also stored under their publication date
+                row = self._conn.execute(
+                    'SELECT eur_rate FROM rates WHERE currency = ? AND rate_date != ? '
+                    'ORDER BY rate_date DESC LIMIT 1', (currency, LATEST)).fetchone()
+            if row is None:
+                raise RuntimeError(f'No exchange rate available for {currency}')
+            rates[currency] = row[0]
+        rates['EUR'] = 1.0
+        return rates
+
+    def close(self) -> None:
+        '''Close the underlying database connection.'''
+        with self._lock:
+            self._conn.close()
+
+
+def _foreign(currencies: Iterable[str]) -> List[str]:
+    return sorted({currency.upper() for currency in currencies} - {'EUR'})
+
+
+def _eur_rates(rates_per_eur: Dict[str, float]) -> Dict[str, float]:
+    # Frankfurter quotes units of each currency per EUR
+    return {currency: 1 / rate for currency, rate in rates_per_eur.items()}
@@ -0,0 +1,176 @@
+"""
+Asynchronous HTTP fetch backend for Indeed pages.
+Loads listing and detail pages without a browser, using a pooled
+keep-alive aiohttp session with bounded per-host concurrency.
+"""
+
+# Standard library imports
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Third-party library imports
+import aiohttp
+from lxml import etree as et
+
+# Local imports
+from utils.metrics import METRICS
+from utils.page_cache import PageCache, fetch_through_cache_async
+from utils.rate_limiter import AdaptiveRateLimiter, is_blocked_page
+from utils.web_scraping_utils import parse_dom
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (X11; Linux x86_64; rv:128.0) '
+                   'Gecko/20100101 Firefox/128.0'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.7,fr;q=0.5,it;q=0.5,sv;q=0.5',
+}
+
+# Statuses worth another attempt: rate limiting and server-side errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncFetcher:
+    '''
+    Fetch pages over HTTP and return the same lxml DOM as get_dom.
+
+    The event loop runs in a background thread, so the blocking methods
+    (get_dom, get_doms, get_page_source) can be called from ordinary code
+    and from several threads at once. Connections are pooled and kept
+    alive per host; at most max_per_host requests are in flight per host,
+    and request starts are paced per host by the adaptive rate_limiter.
+    Server errors, 429 responses, timeouts and connection errors are
+    retried up to max_retries times with exponential back-off starting at
+    retry_backoff seconds; block pages and other statuses are not retried.
+    Pages are served from the optional page cache when present; a cache in
+    replay mode is the only source of pages.
+    '''
+
+    def __init__(self, max_per_host: int = 4, max_connections: int = 32,
+                 timeout: float = 20.0, headers: Optional[Dict[str, str]] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 cache: Optional[PageCache] = None,
+                 max_retries: int = 3, retry_backoff: float = 2.0):
+        self.max_per_host = max_per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(initial_rate=1.0)
+        self.cache = cache
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._start_lock = threading.Lock()
+
+    def __enter__(self) -> 'AsyncFetcher':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> 'AsyncFetcher':
+        '''Start the background event loop and open the HTTP session.'''
+        # Worker threads may all make their first request at once
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+                self._run(self._open_session())
+        return self
+
+    def close(self) -> None:
+        '''Close the HTTP session and stop the background event loop.'''
+        if self._loop is None:
+            return
+        self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop, self._thread, self._session = None, None, None
+
+    async def _open_session(self) -> None:
+        connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                         limit_per_host=self.max_per_host,
+                                         keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def fetch(self, url: str) -> Optional[str]:
+        '''Fetch the page source for a URL, or None on failure.'''
+        return await fetch_through_cache_async(url, self.cache, self._fetch_uncached)
+
+    async def _fetch_uncached(self, url: str) -> Optional[str]:
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                METRICS.incr('page_retries')
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            page_content, retry = await self._fetch_once(url)
+            if not retry:
+                return page_content
+        METRICS.incr('page_failures')
+        return None
+
+    async def _fetch_once(self, url: str):
+        '''Fetch a URL once; return the page source (or None) and whether to retry.'''
+        start = time.perf_counter()
+        while True:
+            delay = self.rate_limiter.acquire(url)
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        METRICS.observe('rate_limit_wait', time.perf_counter() - start)
+        start = time.perf_counter()
+        try:
+            async with self._session.get(url) as response:
+                if response.status != 200:
+                    print(f'HTTP {response.status} for {url}')
+                    self.rate_limiter.record(url, time.perf_counter() - start, ok=False)
+                    if response.status in RETRY_STATUSES:
+                        return None, True
+                    METRICS.incr('page_failures')
+                    return None, False
+                page_content = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f'Error fetching {url}: {e!r}')
+            self.rate_limiter.record(url, time.perf_counter() - start, ok=False)
+            return None, True
+
+        elapsed = time.perf_counter() - start
+        METRICS.observe('http_fetch', elapsed)
+        blocked = is_blocked_page(page_content)
+        self.rate_limiter.record(url, elapsed, blocked=blocked)
+        if blocked:
+            print(f'Block page served for {url}')
+            METRICS.incr('blocked_pages')
+            return None, False
+        METRICS.incr('pages_loaded')
+        return page_content, False
+
+    async def fetch_many(self, urls: List[str]) -> List[Optional[str]]:
+        '''Fetch several URLs concurrently, preserving their order.'''
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def get_page_source(self, url: str) -> Optional[str]:
+        '''Blocking wrapper around fetch.'''
+        self.start()
+        return self._run(self.fetch(url))
+
+    def get_dom(self, url: str) -> Optional[et._Element]:
+        '''Fetch a URL and return its parsed DOM, or None on failure.'''
+        page_content = self.get_page_source(url)
+        return parse_dom(page_content) if page_content is not None else None
+
+    def get_doms(self, urls: List[str]) -> List[Optional[et._Element]]:
+        '''Fetch several URLs concurrently and return their parsed DOMs.'''
+        self.start()
+        pages = self._run(self.fetch_many(urls))
+        return [parse_dom(page) if page is not None else None for page in pages]
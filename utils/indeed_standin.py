@@ -0,0 +1,260 @@
+"""
+Local stand-in for Indeed, for load-testing the scraper offline.
+Serves search results and job detail pages with the markup the extractors
+read (job_seen_beacon cards, the job-count pane, the embedded job-cards
+JSON, jobDescriptionText and salaryInfoAndJobType), with configurable
+result counts, latency, server errors and block pages.
+
+Usage:
+    python -m utils.indeed_standin --port 8000 --latency 0.2 --error-rate 0.05
+"""
+
+# Standard library imports
+import argparse
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+
+# Indeed shows around 15 cards per results page but pages by 10 (see PAGE_STRIDE)
+CARDS_PER_PAGE = 15
+
+SALARY_SAMPLES = [
+    '45 000 € - 55 000 € par an',
+    'De 3 200 € à 3 800 € par mois',
+    '40 000 kr - 48 000 kr i månaden',
+    '€35.000 - €42.000 all\'anno',
+    '$95,000 - $120,000 a year',
+    '$45 - $60 an hour',
+]
+DESCRIPTION_SENTENCES = [
+    'You will build dashboards and reports for business stakeholders.',
+    'Strong SQL and Python skills are required.',
+    'Experience with Tableau or Power BI is a plus.',
+    'You will design A/B tests and analyse product metrics.',
+    'Knowledge of statistics and machine learning is expected.',
+    'You will work with data engineers on ETL pipelines in the cloud.',
+]
+BLOCK_PAGE = ('<html><head><title>Just a moment...</title></head>'
+              '<body><form id="challenge-form"></form></body></html>')
+
+
+class StandinConfig:
+    '''
+    Behaviour of the stand-in server.
+
+    jobs_per_search postings are returned for every keyword/location search,
+    newest first with sort=date. Each response is delayed by latency seconds
+    plus up to latency_jitter, and fails with HTTP 503 with probability
+    error_rate or returns a block page with probability block_rate. A
+    fraction salary_rate of postings has a salary. Fields can be changed
+    while the server runs.
+    '''
+
+    def __init__(self, jobs_per_search: int = 45, latency: float = 0.0,
+                 latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 block_rate: float = 0.0, salary_rate: float = 0.6,
+                 embed_json: bool = True, seed: int = 0):
+        self.jobs_per_search = jobs_per_search
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.salary_rate = salary_rate
+        self.embed_json = embed_json
+        self.seed = seed
+
+
+def job_key(job_keyword: str, location_keyword: str, index: int, seed: int = 0) -> str:
+    '''Return the stable 16-hex-digit job key of the index-th posting of a search.'''
+    text = f'{seed}|{job_keyword}|{location_keyword}|{index}'
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _job(job_key: str, index: int, salary_rate: float) -> Dict[str, str]:
+    rng = random.Random(job_key)
+    has_salary = rng.random() < salary_rate
+    return {
+        'jobkey': job_key,
+        'displayTitle': f'Data Analyst {index}',
+        'company': f'Company {rng.randint(1, 500)}',
+        'formattedLocation': rng.choice(['Paris (75)', 'Stockholm', 'Milano, Lombardia', 'Chicago, IL']),
+        'salary': rng.choice(SALARY_SAMPLES) if has_salary else '',
+        'description': ' '.join(rng.sample(DESCRIPTION_SENTENCES, 3)),
+    }
+
+
+def render_results_page(config: StandinConfig, job_keyword: str, location_keyword: str,
+                        start: int, sort_by_date: bool) -> str:
+    '''Render one search results page.'''
+    total = config.jobs_per_search
+    # Postings are numbered by age; the newest has the highest index
+    indices = list(range(total))
+    if sort_by_date:
+        indices.reverse()
+    jobs = [_job(job_key(job_keyword, location_keyword, index, config.seed), index,
+                 config.salary_rate)
+            for index in indices[start:start + CARDS_PER_PAGE]]
+
+    cards = []
+    for job in jobs:
+        salary = (f'<div class="salary-snippet-container">{html.escape(job["salary"])}</div>'
+                  if job['salary'] else '')
+        cards.append(
+            '<div class="job_seen_beacon"><table><tbody><tr><td>'
+            f'<h2 class="jobTitle"><a href="/rc/clk?jk={job["jobkey"]}&amp;bb=standin&amp;xkcb=SoA'
+            f'&amp;fccid=0&amp;vjs=3" data-jk="{job["jobkey"]}">'
+            f'<span title="{html.escape(job["displayTitle"])}">{html.escape(job["displayTitle"])}</span></a></h2>'
+            f'<div class="company_location"><span data-testid="company-name">{html.escape(job["company"])}</span>'
+            f'<div data-testid="text-location">{html.escape(job["formattedLocation"])}</div></div>'
+            f'{salary}</td></tr></tbody></table></div>')
+
+    script = ''
+    if config.embed_json:
+        results = [{'jobkey': job['jobkey'], 'displayTitle': job['displayTitle'],
+                    'title': job['displayTitle'], 'company': job['company'],
+                    'formattedLocation': job['formattedLocation'],
+                    'salarySnippet': {'text': job['salary']} if job['salary'] else {},
+                    'snippet': f'<ul><li>{html.escape(job["description"].split(".")[0])}.</li></ul>'}
+                   for job in jobs]
+        provider_data = {'metaData': {'mosaicProviderJobCardsModel': {'results': results}}}
+        # Escape "</" so descriptions can't close the script element
+        payload = json.dumps(provider_data).replace('</', '<\\/')
+        script = ('<script id="mosaic-data" type="text/javascript">window.mosaic = window.mosaic || {};'
+                  f'window.mosaic.providerData["mosaic-provider-jobcards"]={payload};'
+                  'window.mosaic.providerData["mosaic-provider-rich-media"]={};</script>')
+
+    return ('<!DOCTYPE html><html><head><title>Data Analyst jobs</title>'
+            f'{script}</head><body><div id="mosaic-provider-jobcards">{"".join(cards)}</div>'
+            '<div class="jobsearch-JobCountAndSortPane-jobCount css-13jafh6 eu4oa1w0">'
+            f'<span>{total:,} jobs</span></div></body></html>')
+
+
+def render_detail_page(config: StandinConfig, job_key: str) -> str:
+    '''Render the detail page of a posting.'''
+    job = _job(job_key, 0, config.salary_rate)
+    salary = (f'<span class="css-19j1a75 eu4oa1w0">{html.escape(job["salary"])}</span>'
+              if job['salary'] else '')
+    return ('<!DOCTYPE html><html><head><title>Job</title></head><body>'
+            f'<div id="salaryInfoAndJobType">{salary}<span class="css-k5flys">CDI</span></div>'
+            '<div id="jobDescriptionText" class="jobsearch-jobDescriptionText">'
+            f'<p>{html.escape(job["description"])}</p><ul><li>Python</li><li>SQL</li></ul>'
+            '</div></body></html>')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'StandinServer'
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        rng = random.Random()
+        time.sleep(config.latency + rng.uniform(0, config.latency_jitter))
+        self.server.count('requests')
+        if rng.random() < config.error_rate:
+            self.server.count('errors')
+            self._send(503, '<html><body>Service Unavailable</body></html>')
+            return
+        if rng.random() < config.block_rate:
+            self.server.count('blocks')
+            self._send(200, BLOCK_PAGE)
+            return
+
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        if parts.path == '/jobs':
+            self.server.count('results_pages')
+            body = render_results_page(config, params.get('q', ''), params.get('l', ''),
+                                       int(params.get('start', 0)), params.get('sort') == 'date')
+        elif parts.path in ('/viewjob', '/rc/clk', '/pagead/clk') and 'jk' in params:
+            self.server.count('detail_pages')
+            body = render_detail_page(config, params['jk'])
+        else:
+            self._send(404, '<html><body>Not found</body></html>')
+            return
+        self._send(200, body)
+
+    def _send(self, status: int, body: str) -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StandinServer(ThreadingHTTPServer):
+    '''
+    Threaded stand-in HTTP server; use as a context manager to run it in a
+    background thread. Its base_url replaces an Indeed base URL.
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[StandinConfig] = None, host: str = '127.0.0.1',
+                 port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config or StandinConfig()
+        self.counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, event: str) -> None:
+        with self._counts_lock:
+            self.counts[event] = self.counts.get(event, 0) + 1
+
+    def search_job_keys(self, job_keyword: str, location_keyword: str) -> List[str]:
+        '''Return the job keys a search serves, oldest first.'''
+        # Keywords arrive URL-decoded, as in 'Data+Analyst' -> 'Data Analyst'
+        job_keyword, location_keyword = unquote_plus(job_keyword), unquote_plus(location_keyword)
+        return [job_key(job_keyword, location_keyword, index, self.config.seed)
+                for index in range(self.config.jobs_per_search)]
+
+    def __enter__(self) -> 'StandinServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local Indeed stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--jobs-per-search', type=int, default=45)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per response')
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of HTTP 503s')
+    parser.add_argument('--block-rate', type=float, default=0.0, help='Fraction of block pages')
+    parser.add_argument('--no-json', action='store_true', help='Omit the embedded job-cards JSON')
+    args = parser.parse_args()
+
+    config = StandinConfig(args.jobs_per_search, args.latency, args.latency_jitter,
+                           args.error_rate, args.block_rate, embed_json=not args.no_json)
+    server = StandinServer(config, args.host, args.port)
+    print(f'Serving Indeed stand-in on {server.base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
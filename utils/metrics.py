@@ -0,0 +1,179 @@
+"""
+Lightweight instrumentation for the scraper.
+Collects per-stage latency histograms and event counters in a module-level
+registry, and exports them as a Prometheus text file and an end-of-run
+summary. Metrics are disabled by default, in which case every call returns
+immediately without taking locks or reading the clock.
+"""
+
+# Standard library imports
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    '''Cumulative-bucket latency histogram in the Prometheus style.'''
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q: float) -> float:
+        '''Estimate a quantile as the upper bound of the bucket containing it.'''
+        target = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= target:
+                return bound
+        return float('inf')
+
+
+class _Timer:
+    def __init__(self, metrics: 'ScrapeMetrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.incr(f'{self.stage}_errors')
+
+
+class ScrapeMetrics:
+    '''Registry of stage timings and event counters.'''
+
+    def __init__(self, enabled: bool = False, prometheus_path: Optional[str] = None):
+        self.enabled = enabled
+        self.prometheus_path = prometheus_path
+        self.reset()
+
+    def reset(self) -> None:
+        '''Clear all recorded timings and counters.'''
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = defaultdict(Histogram)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._started = time.monotonic()
+
+    def timer(self, stage: str):
+        '''Context manager timing a stage; a shared no-op when disabled.'''
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        '''Record one duration for a stage.'''
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histograms[stage].observe(seconds)
+
+    def incr(self, counter: str, amount: int = 1) -> None:
+        '''Increment an event counter.'''
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[counter] += amount
+
+    def counters(self) -> Dict[str, int]:
+        '''Return a copy of the event counters.'''
+        with self._lock:
+            return dict(self._counters)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def rates(self) -> Dict[str, float]:
+        '''Return throughput figures derived from the counters.'''
+        elapsed = max(self.elapsed(), 1e-9)
+        return {'pages_per_second': self._counters.get('pages_loaded', 0) / elapsed,
+                'jobs_per_second': self._counters.get('jobs_written', 0) / elapsed}
+
+    def to_prometheus(self) -> str:
+        '''Render all metrics in the Prometheus text exposition format.'''
+        lines: List[str] = []
+        with self._lock:
+            lines.append('# HELP scraper_stage_seconds Time spent per scraping stage.')
+            lines.append('# TYPE scraper_stage_seconds histogram')
+            for stage, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines.append('# HELP scraper_events_total Scraper events such as pages, failures and restarts.')
+            lines.append('# TYPE scraper_events_total counter')
+            for counter, value in sorted(self._counters.items()):
+                lines.append(f'scraper_events_total{{event="{counter}"}} {value}')
+        for name, value in self.rates().items():
+            lines.append(f'# TYPE scraper_{name} gauge')
+            lines.append(f'scraper_{name} {value:.4f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        '''Write metrics atomically to a Prometheus text file.'''
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def summary(self) -> str:
+        '''Return a human-readable table of stage timings and counters.'''
+        lines = [f'Scrape metrics after {self.elapsed():.1f} s']
+        with self._lock:
+            lines.append(f"{'stage':<24}{'count':>8}{'total s':>10}{'mean s':>9}{'p95 s':>8}")
+            for stage, histogram in sorted(self._histograms.items(),
+                                           key=lambda item: -item[1].sum):
+                mean = histogram.sum / max(histogram.count, 1)
+                lines.append(f'{stage:<24}{histogram.count:>8}{histogram.sum:>10.2f}'
+                             f'{mean:>9.3f}{histogram.quantile(0.95):>8.2f}')
+            for counter, value in sorted(self._counters.items()):
+                lines.append(f'{counter:<24}{value:>8}')
+        for name, value in self.rates().items():
+            lines.append(f'{name:<24}{value:>8.2f}')
+        return '\n'.join(lines)
+
+    def report(self) -> None:
+        '''Print the summary and write the Prometheus file, if enabled.'''
+        if not self.enabled:
+            return
+        print(self.summary())
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+
+# Registry shared by all scraper modules
+METRICS = ScrapeMetrics()
+
+
+def enable_metrics(prometheus_path: Optional[str] = None) -> ScrapeMetrics:
+    '''Start collecting metrics from now on, optionally exporting to a file.'''
+    METRICS.reset()
+    METRICS.prometheus_path = prometheus_path
+    METRICS.enabled = True
+    return METRICS
+
+
+def disable_metrics() -> None:
+    '''Stop collecting metrics.'''
+    METRICS.enabled = False
@@ -0,0 +1,220 @@
+"""
+Content-addressed on-disk cache of fetched page sources.
+Pages are stored gzip-compressed under the SHA-256 of their content and
+indexed by normalized URL, with TTL and size-based eviction. In replay
+mode pages are served only from the cache, so extractors and parsers can
+be re-run offline over previously scraped pages.
+"""
+
+# Standard library imports
+import asyncio
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Local imports
+from utils.metrics import METRICS
+
+# Query parameters that only track clicks and don't change the page
+TRACKING_PARAMS = {'bb', 'xkcb', 'fccid', 'vjs', 'tk', 'from', 'advn', 'adid', 'sjdu', 'acatk', 'pub'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pages (
+    url_key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    content_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+'''
+
+
+def normalize_url(url: str) -> str:
+    '''
+    Normalize a URL into a cache key.
+    Job links (/rc/clk, /pagead/clk, /viewjob) with a jk id all map to the
+    same viewjob key; other URLs keep their non-tracking query parameters
+    in sorted order.
+    '''
+    parts = urlsplit(url)
+    params = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+              if key not in TRACKING_PARAMS]
+    job_keys = [value for key, value in params if key == 'jk']
+    if job_keys:
+        path, params = '/viewjob', [('jk', job_keys[0])]
+    else:
+        path = parts.path or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path,
+                       urlencode(sorted(params)), ''))
+
+
+class PageCache:
+    '''
+    Compressed page store keyed by normalized URL.
+
+    Identical page sources are stored once. Entries older than ttl seconds
+    are treated as missing (except in replay mode) and removed by evict(),
+    which also drops least recently used entries above max_bytes.
+    '''
+
+    def __init__(self, directory: str, ttl: float = 7 * 24 * 3600,
+                 max_bytes: int = 2 * 1024 ** 3, replay: bool = False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay = replay
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'),
+                                     check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+
+    def __enter__(self) -> 'PageCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _object_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, 'objects', content_hash[:2], f'{content_hash}.gz')
+
+    def get(self, url: str) -> Optional[str]:
+        '''Return the cached page source for a URL, or None if missing or expired.'''
+        url_key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_hash, fetched_at FROM pages WHERE url_key = ?',
+                (url_key,)).fetchone()
+            if row is None or (not self.replay and now - row[1] > self.ttl):
+                return None
+            self._conn.execute('UPDATE pages SET last_access = ? WHERE url_key = ?',
+                               (now, url_key))
+            self._conn.commit()
+        try:
+            with gzip.open(self._object_path(row[0]), 'rb') as f:
+                return f.read().decode('utf-8')
+        except OSError as e:
+            print(f'Error reading cached page for {url}: {e}')
+            return None
+
+    def put(self, url: str, page_content: str) -> None:
+        '''Store the page source fetched for a URL.'''
+        data = page_content.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute('INSERT OR IGNORE INTO objects VALUES (?, ?)',
+                                        (content_hash, os.path.getsize(path)))
+            if cursor.rowcount:
+                self._total_bytes += os.path.getsize(path)
+            self._conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                               (normalize_url(url), content_hash, now, now))
+            self._conn.commit()
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        '''Drop expired entries, then least recently used ones above max_bytes.'''
+        with self._lock:
+            self._conn.execute('DELETE FROM pages WHERE fetched_at < ?', (time.time() - self.ttl,))
+            self._delete_orphans()
+            while self._total_bytes > self.max_bytes:
+                url_keys = self._conn.execute(
+                    'SELECT url_key FROM pages ORDER BY last_access LIMIT 20').fetchall()
+                if not url_keys:
+                    break
+                self._conn.executemany('DELETE FROM pages WHERE url_key = ?', url_keys)
+                self._delete_orphans()
+            self._conn.commit()
+
+    def _delete_orphans(self) -> None:
+        orphans = self._conn.execute(
+            'SELECT content_hash, size FROM objects WHERE content_hash NOT IN '
+            '(SELECT content_hash FROM pages)').fetchall()
+        for content_hash, size in orphans:
+            try:
+                os.remove(self._object_path(content_hash))
+            except FileNotFoundError:
+                pass
+            self._total_bytes -= size
+        self._conn.executemany('DELETE FROM objects WHERE content_hash = ?',
+                               [(content_hash,) for content_hash, _ in orphans])
+
+    def stats(self) -> Dict[str, int]:
+        '''Return the number of cached URLs, stored objects and bytes on disk.'''
+        with self._lock:
+            pages = self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+            objects = self._conn.execute('SELECT COUNT(*) FROM objects').fetchone()[0]
+        return {'pages': pages, 'objects': objects, 'bytes': self._total_bytes}
+
+    def close(self) -> None:
+        '''Close the cache index.'''
+        with self._lock:
+            self._conn.close()
+
+
+def lookup_page(url: str, cache: PageCache) -> Tuple[bool, Optional[str]]:
+    '''
+    Look a URL up in the cache. Returns whether the lookup is final (a hit,
+    or a miss in replay mode) and the cached page source.
+    '''
+    page_content = cache.get(url)
+    METRICS.incr('page_cache_hits' if page_content is not None else 'page_cache_misses')
+    return page_content is not None or cache.replay, page_content
+
+
+def fetch_through_cache(url: str, cache: Optional[PageCache],
+                        fetch: Callable[[str], Optional[str]]) -> Optional[str]:
+    '''
+    Return a URL's page source from the cache, falling back to fetch and
+    storing its result. In replay mode fetch is never called.
+    '''
+    if cache is None:
+        return fetch(url)
+    final, page_content = lookup_page(url, cache)
+    if final:
+        return page_content
+    page_content = fetch(url)
+    if page_content is not None:
+        cache.put(url, page_content)
+    return page_content
+
+
+async def fetch_through_cache_async(url: str, cache: Optional[PageCache],
+                                    fetch: Callable[[str], Awaitable[Optional[str]]]
+                                    ) -> Optional[str]:
+    '''
+    Coroutine version of fetch_through_cache for an async fetch. Cache reads
+    and writes run in the loop's default executor, so their disk I/O
+    doesn't hold up other requests in flight.
+    '''
+    if cache is None:
+        return await fetch(url)
+    loop = asyncio.get_running_loop()
+    final, page_content = await loop.run_in_executor(None, lookup_page, url, cache)
+    if final:
+        return page_content
+    page_content = await fetch(url)
+    if page_content is not None:
+        await loop.run_in_executor(None, cache.put, url, page_content)
+    return page_content
@@ -0,0 +1,114 @@
+"""
+Adaptive per-host request rate control for scraping.
+Replaces fixed random sleeps with an AIMD controller: the request rate
+grows additively while responses are healthy and is cut multiplicatively
+on errors, slow responses or captcha/block pages.
+"""
+
+# Standard library imports
+import random
+import re
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+# Markers of captcha or bot-protection pages, matched case-insensitively
+BLOCK_TITLE_MARKERS = ('just a moment', 'security check', 'captcha', 'access denied', 'blocked')
+BLOCK_BODY_MARKERS = ('cf-challenge', 'challenge-form', 'verify you are human')
+TITLE_REGEX = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+
+def is_blocked_page(page_content: str) -> bool:
+    '''Check whether page source looks like a captcha or block page.'''
+    head = page_content[:50000].lower()
+    title_match = TITLE_REGEX.search(head)
+    title = title_match.group(1) if title_match else ''
+    return (any(marker in title for marker in BLOCK_TITLE_MARKERS)
+            or any(marker in head for marker in BLOCK_BODY_MARKERS))
+
+
+def get_host(url: str) -> str:
+    '''Return the scheme and host of a URL, e.g. https://se.indeed.com.'''
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+class AdaptiveRateLimiter:
+    '''
+    AIMD rate controller keeping one request rate per host.
+
+    Rates are in requests per second and shared by every worker using the
+    limiter, so N browsers or connections together respect the host rate.
+    A request slot is only taken once it is due, and the gap since the last
+    request is measured at the current rate, so a rate cut also slows the
+    requests already waiting.
+    '''
+
+    def __init__(self, initial_rate: float = 0.3, min_rate: float = 0.05,
+                 max_rate: float = 5.0, increase: float = 0.05,
+                 decrease: float = 0.5, slow_response: float = 10.0,
+                 jitter: float = 0.2):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_response = slow_response
+        self.jitter = jitter
+        self._rates: Dict[str, float] = {}
+        # Start time of the last request per host, and its jittered gap in
+        # units of the mean interval
+        self._last_start: Dict[str, float] = {}
+        self._gaps: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> float:
+        '''
+        Take a request slot for the URL's host if one is due and return 0;
+        otherwise return the seconds to wait before trying again.
+        '''
+        host = get_host(url)
+        with self._lock:
+            rate = self._rates.setdefault(host, self.initial_rate)
+            now = time.monotonic()
+            if host in self._last_start:
+                due = self._last_start[host] + self._gaps[host] / rate
+                if due > now:
+                    return due - now
+            self._last_start[host] = now
+            self._gaps[host] = random.uniform(1 - self.jitter, 1 + self.jitter)
+        return 0.0
+
+    def wait(self, url: str) -> None:
+        '''Block until a request to the URL's host is allowed.'''
+        while True:
+            delay = self.acquire(url)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def record(self, url: str, latency: float, ok: bool = True, blocked: bool = False) -> None:
+        '''Adapt the host rate to the outcome of a request.'''
+        host = get_host(url)
+        with self._lock:
+            rate = self._rates.setdefault(host, self.initial_rate)
+            if blocked:
+                rate = self.min_rate
+            elif not ok or latency > self.slow_response:
+                rate = max(self.min_rate, rate * self.decrease)
+            else:
+                rate = min(self.max_rate, rate + self.increase)
+            self._rates[host] = rate
+        if blocked:
+            print(f'Block page detected on {host}, slowing down to {rate:.2f} requests/s')
+
+    def rate(self, url: str) -> float:
+        '''Return the current request rate for the URL's host.'''
+        with self._lock:
+            return self._rates.get(get_host(url), self.initial_rate)
+
+    def rates(self) -> Dict[str, float]:
+        '''Return the current request rate of every host seen so far.'''
+        with self._lock:
+            return dict(self._rates)
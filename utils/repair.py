@@ -0,0 +1,156 @@
+"""
+Targeted repair of scraped datasets.
+Selects the rows whose detail fields are missing or failed, re-fetches
+only their job links through a concurrent fetch backend (and page cache),
+and patches the recovered values back into the dataset in place.
+
+Usage:
+    python -m utils.repair data/indeed_jobs_Italy.csv --backend http
+"""
+
+# Standard library imports
+import argparse
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+# Third-party library imports
+import pandas as pd
+
+# Local imports
+import utils.web_scraping_utils as scraper
+from utils.metrics import METRICS, enable_metrics
+from utils.page_cache import PageCache
+from utils.scrape_countries import make_backend
+
+MISSING_VALUES = ('Not available', '')
+
+
+def find_missing(df: pd.DataFrame, columns: Dict[str, str]) -> pd.Series:
+    '''
+    Return a mask of rows where any of the given detail columns is missing,
+    empty or 'Not available'. columns maps detail fields to dataset columns.
+    '''
+    mask = pd.Series(False, index=df.index)
+    for column in columns.values():
+        values = df[column]
+        mask |= values.isna() | values.astype(str).str.strip().isin(MISSING_VALUES)
+    return mask
+
+
+def repair_dataframe(df: pd.DataFrame, backend, columns: Optional[Dict[str, str]] = None,
+                     batch_size: int = 50) -> int:
+    '''
+    Re-fetch the detail pages of rows with missing fields and fill in the
+    recovered values, modifying df in place. Each job link is fetched once
+    even if it appears in several rows. Returns the number of patched cells.
+    '''
+    columns = columns or {field: field for field in scraper.DETAIL_FIELDS}
+    missing = find_missing(df, columns)
+    job_links: List[str] = df.loc[missing, 'job_link'].dropna().unique().tolist()
+    print(f'{missing.sum()} rows with missing fields, {len(job_links)} job links to re-fetch')
+
+    job_keys = df['job_link'].map(scraper.get_job_key, na_action='ignore')
+    patched = 0
+    for start in range(0, len(job_links), batch_size):
+        batch = job_links[start:start + batch_size]
+        with METRICS.timer('repair_batch'):
+            jobs_details = scraper.get_jobs_details(batch, backend=backend)
+        recovered = {scraper.get_job_key(job_link): details
+                     for job_link, details in zip(batch, jobs_details)}
+        for field, column in columns.items():
+            values = job_keys.map({job_key: details[field]
+                                   for job_key, details in recovered.items()
+                                   if details[field] not in MISSING_VALUES})
+            fill = values.notna() & find_missing(df, {field: column})
+            if fill.any() and df[column].dtype != object:
+                # An all-missing column is read back as float NaN
+                df[column] = df[column].astype(object)
+            df.loc[fill, column] = values[fill]
+            patched += int(fill.sum())
+        print(f'Re-fetched {min(start + batch_size, len(job_links))}/{len(job_links)} '
+              f'job links, {patched} fields patched')
+    METRICS.incr('repaired_fields', patched)
+    return patched
+
+
+def read_dataset(path: str) -> pd.DataFrame:
+    '''Read a CSV, JSON Lines or Parquet dataset.'''
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.jsonl'):
+        return pd.read_json(path, lines=True)
+    return pd.read_csv(path)
+
+
+def write_dataset(df: pd.DataFrame, path: str) -> None:
+    '''
+    Write a dataset atomically in the format given by its extension. A
+    Parquet dataset directory (utils.sinks.ParquetSink) is replaced by a
+    directory holding a single part file.
+    '''
+    tmp_path = f'{path}.tmp'
+    if os.path.isdir(path):
+        _write_parquet_directory(df, path, tmp_path)
+        return
+    if path.endswith('.parquet'):
+        df.to_parquet(tmp_path, index=False)
+    elif path.endswith('.jsonl'):
+        df.to_json(tmp_path, orient='records', lines=True, force_ascii=False)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _write_parquet_directory(df: pd.DataFrame, path: str, tmp_path: str) -> None:
+    # Build the new directory next to the old one, then swap them
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    df.to_parquet(os.path.join(tmp_path, f'part-{time.time_ns()}.parquet'), index=False)
+    old_path = f'{path}.old'
+    shutil.rmtree(old_path, ignore_errors=True)
+    os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Re-fetch missing fields of a scraped dataset')
+    parser.add_argument('dataset', help='CSV, JSON Lines or Parquet file to repair')
+    parser.add_argument('--output', help='Write the repaired dataset here instead of in place')
+    parser.add_argument('--backend', choices=['http', 'browser'], default='http')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Concurrent requests per host, or browsers')
+    parser.add_argument('--cache-dir', default='page_cache', help="Page cache directory, or '' to disable")
+    parser.add_argument('--salary-column', default='salary')
+    parser.add_argument('--description-column', default='job_description')
+    parser.add_argument('--fields', nargs='+', choices=list(scraper.DETAIL_FIELDS),
+                        default=list(scraper.DETAIL_FIELDS), help='Detail fields to repair')
+    parser.add_argument('--metrics', help='Write Prometheus metrics to this file')
+    args = parser.parse_args()
+
+    if args.metrics:
+        enable_metrics(args.metrics)
+    dataset_columns = {'salary': args.salary_column, 'job_description': args.description_column}
+    columns = {field: dataset_columns[field] for field in args.fields}
+    df = read_dataset(args.dataset)
+
+    cache = PageCache(args.cache_dir) if args.cache_dir else None
+    backend = make_backend(args.backend, args.workers, cache)
+    try:
+        patched = repair_dataframe(df, backend, columns)
+    finally:
+        backend.close()
+        if cache is not None:
+            cache.close()
+
+    output = args.output or args.dataset
+    write_dataset(df, output)
+    print(f'{patched} fields patched, {find_missing(df, columns).sum()} rows still missing '
+          f'fields; written to {output}')
+    METRICS.report()
+
+
+if __name__ == '__main__':
+    main()
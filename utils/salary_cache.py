@@ -0,0 +1,90 @@
+"""
+Cross-run cache of parsed salary strings.
+The same salary bands are posted over and over, so the amount range and
+currency parsed from each (country, lowercased salary text) pair are
+stored, and later runs only parse strings they haven't seen before.
+"""
+
+# Standard library imports
+import math
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS parsed_salaries (
+    parser_version INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    salary TEXT NOT NULL,
+    min_salary REAL,
+    max_salary REAL,
+    currency TEXT,
+    PRIMARY KEY (parser_version, country, salary)
+);
+'''
+
+# (min_salary, max_salary, currency); missing amounts are NaN
+ParsedSalary = Tuple[float, float, Optional[str]]
+
+
+class SalaryParseCache:
+    '''
+    Persistent map from (country, salary text) to its parsed salary.
+
+    Entries are tagged with the parser_version they were parsed with and
+    entries of other versions are ignored, so bumping the version when a
+    parser's output changes invalidates them. The entries of the current
+    version are loaded into memory when the cache is opened.
+    '''
+
+    def __init__(self, path: str, parser_version: int):
+        self.path = path
+        self.parser_version = parser_version
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._entries: Dict[Tuple[str, str], ParsedSalary] = {
+            (country, salary): (_to_float(min_salary), _to_float(max_salary), currency)
+            for country, salary, min_salary, max_salary, currency in self._conn.execute(
+                'SELECT country, salary, min_salary, max_salary, currency FROM parsed_salaries '
+                'WHERE parser_version = ?', (parser_version,))}
+
+    def __enter__(self) -> 'SalaryParseCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, country: str, salaries: List[str]) -> Dict[str, ParsedSalary]:
+        '''Return the cached parses of those salary texts of a country that were seen before.'''
+        with self._lock:
+            return {salary: self._entries[(country, salary)] for salary in salaries
+                    if (country, salary) in self._entries}
+
+    def add(self, country: str, parsed: Iterable[Tuple[str, float, float, Optional[str]]]) -> None:
+        '''Store (salary text, min, max, currency) parses of a country.'''
+        rows = [(self.parser_version, country, salary, _to_sql(min_salary), _to_sql(max_salary),
+                 currency) for salary, min_salary, max_salary, currency in parsed]
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO parsed_salaries VALUES (?, ?, ?, ?, ?, ?)',
+                                   rows)
+            self._conn.commit()
+            for _, _, salary, min_salary, max_salary, currency in rows:
+                self._entries[(country, salary)] = (_to_float(min_salary), _to_float(max_salary),
+                                                    currency)
+
+    def close(self) -> None:
+        '''Close the underlying database connection.'''
+        with self._lock:
+            self._conn.close()
+
+
+def _to_float(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def _to_sql(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
@@ -1,11 +1,15 @@
-import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import requests
 
-from utils.dictionaries import TIME_KEYWORDS, TIME_PERIOD_MAP
+from utils.dictionaries import COUNTRIES_LANGUAGES, COUNTRY_CODE_MAP, TIME_KEYWORDS, TIME_PERIOD_MAP
+from utils.exchange_rates import ExchangeRateProvider
+from utils.metrics import METRICS
+from utils.salary_cache import SalaryParseCache
 
 def get_time_keywords(language: str, time_keyword_dict: Dict[str, Dict[str, str]]) -> Dict[str, str]:
     '''Get time unit keywords for specified language.'''
@@ -22,108 +26,267 @@ def convert_salary_to_monthly(df: pd.DataFrame, salary_column: str, time_unit_co
     factors = df[time_unit_column].str.lower().map(TIME_PERIOD_MAP)
     return df[salary_column] * factors
 
-def parse_french_salary(s: pd.Series) -> pd.DataFrame:
-    '''Parse French salary strings into min/max values and currency.'''
-    number_pattern = r'[\d\s\xa0]+(?:,\d+)?'
-    
-    def extract_numbers(row: str) -> List[float]:
-        numbers = re.findall(number_pattern, row)
-        numbers = [float(num.replace('\xa0', '').replace(' ', '').replace(',', '.')) 
-                  for num in numbers if num.strip()]
-        return [numbers[0], numbers[1] if len(numbers) >= 2 else numbers[0]]
+# RE2 patterns (pyarrow.compute) capturing the first two amounts of a salary
+# string; a single amount is both min and max. RE2's \s is ASCII-only, so
+# the (narrow) no-break spaces used as thousands separators in French and
+# Swedish amounts are listed explicitly
+FRENCH_SALARY_PATTERN = (r'(?P<min>\d[\d\s\x{a0}\x{202f}]*(?:,\d+)?)'
+                         r'(?:\D*(?P<max>\d[\d\s\x{a0}\x{202f}]*(?:,\d+)?))?')
+SWEDISH_SALARY_PATTERN = (r'(?P<min>\d+[\s\x{a0}\x{202f}]*\d*)'
+                          r'(?:\D*(?P<max>\d+[\s\x{a0}\x{202f}]*\d*))?')
+ITALIAN_SALARY_PATTERN = r'(?P<min>\d+)(?:\D*(?P<max>\d+))?'
+ITALIAN_THOUSANDS_PATTERN = r'(\d+)\.(\d{3})'
+USA_SALARY_PATTERN = (r'\$?(?P<min>\d+(?:,\d{3})*(?:\.\d{2})?|\d+)'
+                      r'(?:\D*(?P<max>\d+(?:,\d{3})*(?:\.\d{2})?|\d+))?')
+SALARY_DURATION_PATTERN = r'durée jusqu\'à \d+\s*mois'
+
+def _to_arrow(s: pd.Series) -> pa.Array:
+    # An all-missing column is read back as float NaN
+    if s.dtype.kind == 'f':
+        s = s.astype(object)
+    return pa.array(s, type=pa.string(), from_pandas=True)
+
+def _valid_salaries(text: pa.Array) -> np.ndarray:
+    has_amount = pc.match_substring_regex(text, r'\d')
+    is_duration = pc.match_substring_regex(text, SALARY_DURATION_PATTERN, ignore_case=True)
+    return pc.and_(has_amount, pc.invert(is_duration)).fill_null(False).to_numpy(zero_copy_only=False)
+
+def valid_salary_mask(salaries: pd.Series) -> pd.Series:
+    '''Mask of salary strings containing an amount, excluding contract durations.'''
+    return pd.Series(_valid_salaries(_to_arrow(salaries)), index=salaries.index)
+
+def _currency(text: pa.Array, pattern: str, currency: str) -> np.ndarray:
+    matches = pc.match_substring_regex(text, pattern, ignore_case=True).fill_null(False)
+    return np.where(matches.to_numpy(zero_copy_only=False), currency, None)
 
-    numbers = s.apply(extract_numbers)
+def _salary_frame(s: pd.Series, text: pa.Array, pattern: str, currency: np.ndarray,
+                  strip: Optional[str] = None, decimal_comma: bool = False) -> pd.DataFrame:
+    '''Extract the min/max amounts of salary strings as float columns.'''
+    numbers = pc.extract_regex(text, pattern)
+    amounts = {}
+    for field in ['min', 'max']:
+        values = numbers.field(field)
+        if strip is not None:
+            values = pc.replace_substring_regex(values, strip, '')
+        if decimal_comma:
+            values = pc.replace_substring(values, ',', '.')
+        # An optional group that did not match is captured as ''
+        values = pc.if_else(pc.equal(values, ''), pa.scalar(None, pa.string()), values)
+        amounts[field] = pc.cast(values, pa.float64())
     return pd.DataFrame({
-        'min_salary': numbers.apply(lambda x: x[0] if x else None),
-        'max_salary': numbers.apply(lambda x: x[1] if x else None),
-        'currency': np.where(s.str.contains('€|euro', case=False), 'euro', None)
-    })
+        'min_salary': amounts['min'].to_numpy(zero_copy_only=False),
+        'max_salary': pc.coalesce(amounts['max'], amounts['min']).to_numpy(zero_copy_only=False),
+        'currency': currency
+    }, index=s.index)
+
+def parse_french_salary(s: pd.Series) -> pd.DataFrame:
+    '''Parse French salary strings into min/max values and currency.'''
+    text = _to_arrow(s)
+    return _salary_frame(s, text, FRENCH_SALARY_PATTERN, _currency(text, '€|euro', 'euro'),
+                         strip=r'[\s\x{a0}\x{202f}]+', decimal_comma=True)
 
 def parse_swedish_salary(s: pd.Series) -> pd.DataFrame:
     '''Parse Swedish salary strings into min/max values and currency.'''
-    number_pattern = r'[\d]+\s*[\d]*'
-    numbers = s.str.findall(number_pattern).apply(lambda x: [x[0], x[1] if len(x) >= 2 else x[0]])
-    return pd.DataFrame({
-        'min_salary': pd.to_numeric(numbers.str[0].str.replace(r'\s+', '', regex=True), errors='coerce'),
-        'max_salary': pd.to_numeric(numbers.str[1].str.replace(r'\s+', '', regex=True), errors='coerce'),
-        'currency': np.where(s.str.contains('kr|kronor|sek', case=False), 'sek', None)
-    })
+    text = _to_arrow(s)
+    return _salary_frame(s, text, SWEDISH_SALARY_PATTERN, _currency(text, 'kr|kronor|sek', 'sek'),
+                         strip=r'[\s\x{a0}\x{202f}]+')
 
 def parse_italian_salary(s: pd.Series) -> pd.DataFrame:
     '''Parse Italian salary strings into min/max values and currency.'''
-    s = s.apply(lambda x: re.sub(r'(\d+)\.(\d{3})', r'\1\2', str(x)))
-    numbers = s.str.findall(r'\d+').apply(lambda x: [x[0], x[1] if len(x) >= 2 else x[0]])
-    return pd.DataFrame({
-        'min_salary': pd.to_numeric(numbers.str[0], errors='coerce'),
-        'max_salary': pd.to_numeric(numbers.str[1], errors='coerce'),
-        'currency': np.where(s.str.contains('€|euro', case=False), 'euro', None)
-    })
+    text = pc.replace_substring_regex(_to_arrow(s), ITALIAN_THOUSANDS_PATTERN, r'\1\2')
+    return _salary_frame(s, text, ITALIAN_SALARY_PATTERN, _currency(text, '€|euro', 'euro'))
 
 def parse_usa_salary(s: pd.Series) -> pd.DataFrame:
     '''Parse USA salary strings into min/max values and currency.'''
-    number_pattern = r'\$?(\d+(?:,\d{3})*(?:\.\d{2})?|\d+)'
-    numbers = s.str.findall(number_pattern).apply(lambda x: [x[0], x[1] if len(x) >= 2 else x[0]])
-    return pd.DataFrame({
-        'min_salary': pd.to_numeric(numbers.str[0].str.replace(',', ''), errors='coerce'),
-        'max_salary': pd.to_numeric(numbers.str[1].str.replace(',', ''), errors='coerce'),
-        'currency': np.where(s.str.contains('$|dollar', case=False), 'dollar', None)
-    })
+    text = _to_arrow(s)
+    return _salary_frame(s, text, USA_SALARY_PATTERN, _currency(text, r'\$|dollar', 'dollar'),
+                         strip=',')
+
+SALARY_PARSERS = {
+    'France': parse_french_salary,
+    'Sweden': parse_swedish_salary,
+    'Italy': parse_italian_salary,
+    'USA': parse_usa_salary
+}
+
+# Bump when a parser's output changes, to invalidate SalaryParseCache entries
+SALARY_PARSER_VERSION = 1
+
+# ISO codes of the parsed currency names
+CURRENCY_CODES = {'dollar': 'USD', 'euro': 'EUR', 'sek': 'SEK'}
+CURRENCY_DTYPE = pd.CategoricalDtype(list(CURRENCY_CODES))
+TIME_UNIT_DTYPE = pd.CategoricalDtype(list(TIME_PERIOD_MAP))
+# Monthly and EUR amounts are estimates; 7 significant digits are plenty
+MONTHLY_DTYPE = np.float32
+# Monthly conversion factor per TIME_UNIT_DTYPE code, NaN for code -1
+_MONTHLY_FACTORS = np.array(list(TIME_PERIOD_MAP.values()) + [np.nan])
 
 def parse_salary_column(df: pd.DataFrame, column_name: str = 'salary', 
                        languages: List[str] = ['english'], country: str = 'USA') -> pd.DataFrame:
     '''Parse salary information from text column based on country and language.'''
-    df = df.copy()
-    df['min_salary'] = pd.Series(dtype='Float64')
-    df['max_salary'] = pd.Series(dtype='Float64')
-    df['currency'] = pd.Series(dtype='string')
-    df['time_unit'] = pd.Series(dtype='string')
-
-    duration_pattern = r'durée jusqu\'à \d+\s*mois'
-    valid_mask = (df[column_name].notna() & 
-                 df[column_name].str.contains(r'\d', na=False) & 
-                 ~df[column_name].str.contains(duration_pattern, case=False, na=False))
-    
-    if not valid_mask.any():
-        return df
-
-    s = df.loc[valid_mask, column_name].str.lower()
-
-    parse_funcs = {
-        'France': parse_french_salary,
-        'Sweden': parse_swedish_salary,
-        'Italy': parse_italian_salary,
-        'USA': parse_usa_salary
-    }
-
-    if country in parse_funcs:
-        salary_data = parse_funcs[country](s)
-        df.loc[valid_mask, ['min_salary', 'max_salary', 'currency']] = salary_data
-        print(df.loc[valid_mask, ['min_salary', 'max_salary', 'currency']])
-    else:
+    if country not in SALARY_PARSERS:
         raise ValueError(f'Unsupported country: {country}')
+    salaries = _normalize(df[column_name], np.zeros(len(df), dtype=np.int64), [country],
+                          {country: languages})
+    df = df.copy()
+    for column in ['min_salary', 'max_salary', 'currency', 'time_unit']:
+        df[column] = salaries[column].array
+    return df
 
-    time_patterns = get_time_keywords(languages[0], TIME_KEYWORDS)
-    if len(languages) > 1:
-        time_patterns_2 = get_time_keywords(languages[1], TIME_KEYWORDS)
-        for key in time_patterns:
-            time_patterns[key] = f'{time_patterns[key]}|{time_patterns_2[key]}'
+# Columns added by normalize_salaries
+SALARY_COLUMNS = ['min_salary', 'max_salary', 'currency', 'time_unit',
+                  'min_salary_monthly', 'max_salary_monthly']
 
-    conditions = [s.str.contains(pattern) for pattern in time_patterns.values()]
-    choices = list(time_patterns.keys())
-    df.loc[valid_mask, 'time_unit'] = np.select(conditions, choices, default=None)
+def _time_unit_patterns(languages: List[str]) -> Dict[str, str]:
+    '''Combine the time unit keywords of several languages into one pattern per unit.'''
+    keywords = [get_time_keywords(language, TIME_KEYWORDS) for language in languages]
+    return {unit: '|'.join(dict.fromkeys(language_keywords[unit] for language_keywords in keywords))
+            for unit in keywords[0]}
 
-    for col in ['min_salary', 'max_salary', 'currency', 'time_unit']:
-        df[col] = df[col].replace([np.nan, None], pd.NA)
-        
-    return df
+def _factorize(s: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    '''Dictionary-encode a string column in Arrow; missing values get code -1.'''
+    encoded = _to_arrow(s).dictionary_encode()
+    return encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False), encoded.dictionary.to_pylist()
+
+def _country_languages(country_codes: np.ndarray, countries: List[str],
+                       languages: pd.Series) -> Dict[str, List[str]]:
+    '''Return the languages found for each country, from factorized codes.'''
+    language_codes, languages = _factorize(languages)
+    known = (country_codes >= 0) & (language_codes >= 0)
+    pairs = np.unique(country_codes[known] * len(languages) + language_codes[known])
+    country_languages: Dict[str, List[str]] = {}
+    for country_code, language_code in zip(*np.divmod(pairs, len(languages))):
+        country_languages.setdefault(countries[country_code], []).append(languages[language_code])
+    return country_languages
+
+def _parse_unique_salaries(country: str, salaries: pa.Array,
+                           parse_cache: Optional[SalaryParseCache] = None) -> pd.DataFrame:
+    '''
+    Parse distinct salary texts of a country, taking the ones already in
+    the parse cache from it and adding the others.
+    '''
+    if parse_cache is None:
+        METRICS.incr('salary_strings_parsed', len(salaries))
+        return SALARY_PARSERS[country](pd.Series(pd.arrays.ArrowExtensionArray(salaries)))
+
+    texts = salaries.to_pylist()
+    parsed = parse_cache.lookup(country, texts)
+    new = [position for position, text in enumerate(texts) if text not in parsed]
+    METRICS.incr('salary_cache_hits', len(parsed))
+    METRICS.incr('salary_strings_parsed', len(new))
+    if new:
+        new_salaries = SALARY_PARSERS[country](
+            pd.Series(pd.arrays.ArrowExtensionArray(salaries.take(new))))
+        new_parsed = list(zip([texts[position] for position in new],
+                              new_salaries['min_salary'].tolist(),
+                              new_salaries['max_salary'].tolist(),
+                              new_salaries['currency'].tolist()))
+        parse_cache.add(country, new_parsed)
+        parsed.update((text, values) for text, *values in new_parsed)
+    min_salary, max_salary, currency = zip(*(parsed[text] for text in texts)) if texts else ((), (), ())
+    return pd.DataFrame({
+        'min_salary': np.array(min_salary, dtype=float),
+        'max_salary': np.array(max_salary, dtype=float),
+        'currency': np.array(currency, dtype=object)
+    })
+
+def _parse_country_salaries(country: str, text: pa.Array, languages: List[str],
+                            parse_cache: Optional[SalaryParseCache] = None) -> Tuple[np.ndarray, ...]:
+    '''
+    Parse lowercased salary texts of one country, each distinct text once.
+    Returns per-row min and max amounts and CURRENCY_DTYPE and
+    TIME_UNIT_DTYPE codes (-1 if unknown).
+    '''
+    encoded = text.dictionary_encode()
+    salaries = encoded.dictionary
+    rows_to_unique = encoded.indices.to_numpy(zero_copy_only=False)
+    METRICS.incr('salary_rows', len(text))
+
+    parsed = _parse_unique_salaries(country, salaries, parse_cache)
+    currency_codes = pd.Categorical(parsed['currency'], dtype=CURRENCY_DTYPE).codes
+    patterns = _time_unit_patterns(languages)
+    # First matching unit of each text
+    unit_codes = np.select([pc.match_substring_regex(salaries, pattern).to_numpy(zero_copy_only=False)
+                            for pattern in patterns.values()],
+                           [TIME_UNIT_DTYPE.categories.get_loc(unit) for unit in patterns],
+                           default=-1).astype(np.int8)
+    return (parsed['min_salary'].to_numpy().take(rows_to_unique),
+            parsed['max_salary'].to_numpy().take(rows_to_unique),
+            currency_codes.take(rows_to_unique),
+            unit_codes.take(rows_to_unique))
+
+def _normalize(salary_column: pd.Series, country_codes: np.ndarray, countries: List[str],
+               country_languages: Dict[str, List[str]], chunk_size: int = 100_000,
+               parse_cache: Optional[SalaryParseCache] = None) -> pd.DataFrame:
+    '''Parse a salary column whose rows belong to countries[country_codes]; see normalize_salaries.'''
+    rows = len(salary_column)
+    min_salary = np.full(rows, np.nan)
+    max_salary = np.full(rows, np.nan)
+    currency_codes = np.full(rows, -1, dtype=np.int8)
+    unit_codes = np.full(rows, -1, dtype=np.int8)
+
+    # Only the lowercased text of rows with an amount is kept, converted in
+    # chunks so the column is never held twice in full
+    texts, valid = [], []
+    for start in range(0, rows, chunk_size):
+        chunk = pc.utf8_lower(_to_arrow(salary_column.iloc[start:start + chunk_size]))
+        chunk_valid = np.flatnonzero(_valid_salaries(chunk))
+        texts.append(chunk.take(chunk_valid))
+        valid.append(chunk_valid + start)
+    text = pa.concat_arrays(texts) if texts else pa.array([], type=pa.string())
+    valid = np.concatenate(valid) if valid else np.array([], dtype=np.int64)
+    valid_country_codes = country_codes[valid]
+
+    for code, country in enumerate(countries):
+        local = np.flatnonzero(valid_country_codes == code)
+        if not local.size:
+            continue
+        if country not in SALARY_PARSERS:
+            raise ValueError(f'Unsupported country: {country}')
+        positions = valid[local]
+        languages = country_languages.get(country) or [COUNTRIES_LANGUAGES[COUNTRY_CODE_MAP[country]][1]]
+        (min_salary[positions], max_salary[positions], currency_codes[positions],
+         unit_codes[positions]) = _parse_country_salaries(country, text.take(local), languages,
+                                                          parse_cache)
+
+    factors = _MONTHLY_FACTORS[unit_codes]
+    return pd.DataFrame({
+        'min_salary': min_salary,
+        'max_salary': max_salary,
+        'currency': pd.Categorical.from_codes(currency_codes, dtype=CURRENCY_DTYPE),
+        'time_unit': pd.Categorical.from_codes(unit_codes, dtype=TIME_UNIT_DTYPE),
+        'min_salary_monthly': (min_salary * factors).astype(MONTHLY_DTYPE),
+        'max_salary_monthly': (max_salary * factors).astype(MONTHLY_DTYPE)
+    }, index=salary_column.index, copy=False)
+
+def normalize_salaries(df: pd.DataFrame, column_name: str = 'salary', country_column: str = 'country',
+                       language_column: str = 'language', chunk_size: int = 100_000,
+                       parse_cache: Optional[SalaryParseCache] = None) -> pd.DataFrame:
+    '''
+    Parse the salaries of a multi-country frame in a single pass.
+    Each distinct salary text of a country is parsed once, by the country's
+    parser, and its time unit is matched with the keywords of the languages
+    found for that country (the country's own language if there is no
+    language column); results are broadcast back to the rows. With a
+    parse_cache, texts parsed in earlier runs are not parsed again.
+    Returns a frame of SALARY_COLUMNS on df's index: float64 amounts,
+    categorical currency and time unit, and float32 monthly amounts from
+    TIME_PERIOD_MAP, with NaN for missing values. df itself is not copied
+    or modified.
+    '''
+    country_codes, countries = _factorize(df[country_column])
+    country_languages = (_country_languages(country_codes, countries, df[language_column])
+                         if language_column in df else {})
+    return _normalize(df[column_name], country_codes, countries, country_languages, chunk_size,
+                      parse_cache)
 
-def get_exchange_rate(base_currency: str, target_currency: str) -> Optional[float]:
+def get_exchange_rate(base_currency: str, target_currency: str, timeout: float = 10.0) -> Optional[float]:
     '''Get current exchange rate from Frankfurter API.'''
     url = 'https://api.frankfurter.app/latest'
     params = {'from': base_currency.upper(), 'to': target_currency.upper()}
     
     try:
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         return data['rates'][target_currency.upper()]
@@ -131,42 +294,80 @@ def get_exchange_rate(base_currency: str, target_currency: str) -> Optional[floa
         print(f'Error fetching exchange rate from {base_currency} to {target_currency}: {e}')
         return None
 
-def convert_to_eur(df: pd.DataFrame, exchange_rates: Dict[str, float]) -> pd.DataFrame:
-    '''Convert salary columns to EUR using provided exchange rates.'''
+def _eur_rates(df: pd.DataFrame, exchange_rates: Union[Dict[str, float], ExchangeRateProvider],
+               date_column: Optional[str] = None) -> np.ndarray:
+    '''
+    Return the EUR rate of each row, looked up in a (date, currency) rate
+    table: a row per distinct date plus a last row of latest rates for
+    undated rows, and a column per CURRENCY_DTYPE category plus a last NaN
+    column for unknown currencies.
+    '''
+    currency_codes = pd.Categorical(df['currency'], dtype=CURRENCY_DTYPE).codes
+    codes = [CURRENCY_CODES[currency] for currency in CURRENCY_DTYPE.categories]
+    if not isinstance(exchange_rates, ExchangeRateProvider):
+        table = np.array([[exchange_rates.get(code) for code in codes] + [np.nan]], dtype=float)
+        return table[0, currency_codes]
+
+    if date_column is not None:
+        date_codes, dates = pd.factorize(pd.to_datetime(df[date_column], errors='coerce').dt.date)
+    else:
+        date_codes, dates = np.full(len(df), -1), []
+    used = np.unique(currency_codes[currency_codes >= 0])
+    needed = [codes[code] for code in used]
+    table = np.full((len(dates) + 1, len(codes) + 1), np.nan)
+    if needed and len(dates):
+        rates_by_date = exchange_rates.historical(needed, dates)
+        for row, date in enumerate(dates):
+            table[row, used] = [rates_by_date[date][code] for code in needed]
+    if needed and (date_codes == -1).any():
+        latest = exchange_rates.latest(needed)
+        table[-1, used] = [latest[code] for code in needed]
+    return table[date_codes, currency_codes]
+
+def convert_to_eur(df: pd.DataFrame, exchange_rates: Union[Dict[str, float], ExchangeRateProvider],
+                   date_column: Optional[str] = None) -> pd.DataFrame:
+    '''
+    Convert salary columns to EUR using provided exchange rates: a dict of
+    EUR rates by currency code, or an ExchangeRateProvider. With a provider
+    and a date_column (e.g. the scrape date), each row is converted at the
+    rate of its date. The EUR columns are float32 with NaN where the amount
+    or rate is missing. The provider raises RuntimeError for a currency it
+    has never fetched when the API can't be reached.
+    '''
     df = df.copy()
     
-    currency_mapping = {
-        'dollar': exchange_rates['USD'],
-        'euro': exchange_rates['EUR'],
-        'sek': exchange_rates['SEK']
-    }
-    
-    rates = df['currency'].map(currency_mapping).fillna(np.nan)
+    rates = _eur_rates(df, exchange_rates, date_column)
     
     print('\nDebug Information:')
-    print('Currency mapping:', currency_mapping)
+    print('Mean EUR rate per currency:',
+          pd.Series(rates, index=df.index).groupby(df['currency'], observed=True).mean().to_dict())
     print('\nCurrency value counts:', df['currency'].value_counts(dropna=False))
     
-    mask = rates.notna() & df['min_salary_monthly'].notna()
-    df['min_salary_month_EUR'] = pd.NA
-    df.loc[mask, 'min_salary_month_EUR'] = df.loc[mask, 'min_salary_monthly'] * rates[mask]
-    
-    mask = rates.notna() & df['max_salary_monthly'].notna()
-    df['max_salary_month_EUR'] = pd.NA
-    df.loc[mask, 'max_salary_month_EUR'] = df.loc[mask, 'max_salary_monthly'] * rates[mask]
+    for bound in ('min', 'max'):
+        # to_numeric also accepts object columns with pd.NA from older frames
+        monthly = pd.to_numeric(df[f'{bound}_salary_monthly']).to_numpy(dtype=float, na_value=np.nan)
+        df[f'{bound}_salary_month_EUR'] = (monthly * rates).astype(MONTHLY_DTYPE)
     
     return df
 
-def process_salaries(df: pd.DataFrame) -> pd.DataFrame:
-    '''Process all salaries and convert them to EUR.'''
-    exchange_rates = {
-        'SEK': get_exchange_rate('SEK', 'EUR'),
-        'USD': get_exchange_rate('USD', 'EUR'),
-        'EUR': 1
-    }
-    
-    print('Exchange rates:', exchange_rates)
-    df_converted = convert_to_eur(df, exchange_rates)
+def process_salaries(df: pd.DataFrame, exchange_rates: Optional[ExchangeRateProvider] = None,
+                     date_column: Optional[str] = None) -> pd.DataFrame:
+    '''
+    Process all salaries and convert them to EUR, with rates from
+    exchange_rates or a default ExchangeRateProvider (cached in
+    exchange_rates.sqlite). If the provider has no rate for a currency
+    (a first run without network access), EUR salaries are still copied
+    and the others are left NaN.
+    '''
+    if exchange_rates is None:
+        with ExchangeRateProvider() as provider:
+            return process_salaries(df, provider, date_column)
+
+    try:
+        df_converted = convert_to_eur(df, exchange_rates, date_column)
+    except RuntimeError as e:
+        print(f'{e}; leaving non-EUR salaries unconverted')
+        df_converted = convert_to_eur(df, {'EUR': 1.0})
     
     print('\nSample conversions for each currency:')
     for curr in ['dollar', 'euro', 'sek']:
@@ -183,25 +384,13 @@ def process_salaries(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_converted
 
-def update_salary_data(df: pd.DataFrame) -> pd.DataFrame:
-    '''Update salary columns for each country in the DataFrame.'''
-    df = df.copy()
-   
-    for country in df['country'].unique():
-        mask = df['country'] == country
-        unique_langs = df[mask]['language'].unique().tolist()
-       
-        print('*' * 30, f'Retrieving salaries for {country}:', f'Languages: {unique_langs}', sep='\n')
-       
-        result = parse_salary_column(df[mask], languages=unique_langs, country=country)
-        print(f'Rows changed for {country}: {result.shape[0]}. Original rows retrieved: {df[mask].shape[0]}')
-       
-        if result.shape[0] != df[mask].shape[0]:
-            print(f"Warning: Size mismatch for {country}. Expected {df[mask].size}, got {result.size}")
-            return df
-           
-        columns_to_update = ['min_salary', 'max_salary', 'currency', 'time_unit']
-        df.loc[mask, columns_to_update] = result[columns_to_update]
-        print('*' * 30 + '\n')
-   
-    return df
\ No newline at end of file
+def update_salary_data(df: pd.DataFrame, parse_cache: Optional[SalaryParseCache] = None) -> pd.DataFrame:
+    '''Add the parsed salary columns and monthly amounts for every country in the DataFrame.'''
+    salaries = normalize_salaries(df, parse_cache=parse_cache)
+    df = df.copy(deep=False)
+    for column in SALARY_COLUMNS:
+        df[column] = salaries[column]
+    parsed = salaries['min_salary'].notna().groupby(df['country'], sort=False).agg(['sum', 'size'])
+    for country, (parsed_rows, rows) in parsed.iterrows():
+        print(f'{country}: {parsed_rows} salaries parsed out of {rows} rows')
+    return df
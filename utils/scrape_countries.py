@@ -0,0 +1,227 @@
+"""
+Non-interactive scraping of several countries at once.
+Each country runs in its own thread with its own fetch backend, concurrency
+budget, checkpoint and output sink, so a full refresh takes about as long
+as the slowest country. Countries are independent hosts, so their rate
+limits don't interfere. The page cache and seen-jobs index are shared.
+With --incremental, each search only fetches postings newer than its last
+completed crawl and the new rows are appended to the existing outputs.
+
+Usage:
+    python -m utils.scrape_countries --countries France Sweden --budget France=3
+"""
+
+# Standard library imports
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Local imports
+import utils.web_scraping_utils as scraper
+from utils.checkpoint import CheckpointStore
+from utils.crawl_state import CrawlState, load_job_keys
+from utils.detail_queue import (DETAIL_COLUMNS, merge_details, pending_details,
+                                scrape_jobs_two_phase)
+from utils.dictionaries import COUNTRY_CONFIGS, JOB_SEARCH_KEYWORDS
+from utils.metrics import METRICS, enable_metrics
+from utils.page_cache import PageCache
+from utils.seen_jobs import SeenJobIndex
+from utils.sinks import open_sink
+
+
+def make_backend(backend: str, workers: int, cache: Optional[PageCache] = None,
+                 profile: str = 'lean'):
+    '''Create a fetch backend sized for a country's concurrency budget.'''
+    if backend == 'http':
+        from utils.http_fetcher import AsyncFetcher
+        return AsyncFetcher(max_per_host=workers, cache=cache)
+    from utils.driver_pool import DriverPool
+    return DriverPool(size=workers, cache=cache, profile=profile)
+
+
+def scrape_country(country: str, output_dir: str, workers: int = 2, backend: str = 'browser',
+                   sink_format: str = 'csv', job_keywords: List[str] = JOB_SEARCH_KEYWORDS,
+                   cache: Optional[PageCache] = None, seen_jobs=None,
+                   profile: str = 'lean', crawl_state: Optional[CrawlState] = None,
+                   extractor: str = 'xpath', two_phase: bool = False,
+                   max_detail_fetches: Optional[int] = None) -> str:
+    '''
+    Scrape every keyword/city search of one country into its own sink,
+    running up to `workers` searches at once; returns the output path.
+    A full scrape resumes from the country's checkpoint. With a crawl_state
+    the scrape is an incremental refresh that stops at postings already in
+    the output. It is not checkpointed since it only covers a few pages, and
+    bypasses the page cache, which would serve stale results pages.
+    With two_phase, card records are written first and detail pages are
+    fetched in priority order into a separate .details output
+    (see utils.detail_queue), which is merged into the output at the end.
+    Records of an earlier run whose details were never fetched are queued
+    again.
+    '''
+    base_url, location_keywords = COUNTRY_CONFIGS[country].values()
+    output_path = os.path.join(output_dir, f'indeed_jobs_{country}.{sink_format}')
+    if crawl_state is not None:
+        cache, checkpoint, known_jobs = None, None, load_job_keys(output_path)
+        print(f'{country}: incremental refresh of {output_path} '
+              f'({len(known_jobs)} known postings)')
+    else:
+        checkpoint, known_jobs = CheckpointStore(
+            os.path.join(output_dir, f'indeed_jobs_{country}.checkpoint.sqlite')), None
+    fetch_backend = make_backend(backend, workers, cache, profile)
+    scrape_kwargs = dict(checkpoint=checkpoint, seen_jobs=seen_jobs, crawl_state=crawl_state,
+                         known_jobs=known_jobs, extractor=extractor)
+    details_path = os.path.join(output_dir, f'indeed_jobs_{country}.details.{sink_format}')
+    pending = _pending_details(output_path, details_path) if two_phase else []
+    start = time.monotonic()
+    try:
+        sink = open_sink(output_path, sink_format)
+        with sink:
+            if two_phase:
+                with open_sink(details_path, sink_format, columns=DETAIL_COLUMNS) as details_sink:
+                    scrape_jobs_two_phase(sink, details_sink, job_keywords, location_keywords,
+                                          country, base_url, fetch_backend, max_workers=workers,
+                                          detail_workers=workers,
+                                          max_detail_fetches=max_detail_fetches,
+                                          pending=pending, **scrape_kwargs)
+            else:
+                scraper.scrape_jobs(
+                    csv_writer=sink,
+                    driver=None,
+                    job_keywords=job_keywords,
+                    location_keywords=location_keywords,
+                    selected_country=country,
+                    base_url=base_url,
+                    backend=fetch_backend,
+                    max_workers=workers,
+                    **scrape_kwargs
+                )
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        fetch_backend.close()
+    if two_phase:
+        _merge_details_output(output_path, details_path)
+    print(f'{country}: {sink.records_written} records written to {output_path} '
+          f'in {time.monotonic() - start:.0f} s')
+    return output_path
+
+
+def _pending_details(output_path: str, details_path: str) -> List[Tuple[str, Dict[str, str]]]:
+    '''Return the records of an earlier run still waiting for details (see pending_details).'''
+    # utils.repair imports this module
+    from utils.repair import read_dataset
+    if not os.path.exists(output_path):
+        return []
+    details = read_dataset(details_path) if os.path.exists(details_path) else None
+    return pending_details(read_dataset(output_path), details)
+
+
+def _merge_details_output(output_path: str, details_path: str) -> None:
+    '''Fill the records of an output with the fields of its details output, in place.'''
+    from utils.repair import read_dataset, write_dataset
+    if not (os.path.exists(output_path) and os.path.exists(details_path)):
+        return
+    details = read_dataset(details_path)
+    if len(details):
+        write_dataset(merge_details(read_dataset(output_path), details), output_path)
+
+
+def scrape_countries(countries: List[str], output_dir: str, budgets: Dict[str, int],
+                     default_workers: int = 2, **kwargs) -> Dict[str, Optional[str]]:
+    '''
+    Scrape several countries concurrently, one thread per country.
+    A failing country doesn't stop the others; its result is None.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    results: Dict[str, Optional[str]] = {}
+    with ThreadPoolExecutor(max_workers=len(countries)) as executor:
+        futures = {country: executor.submit(scrape_country, country, output_dir,
+                                            budgets.get(country, default_workers), **kwargs)
+                   for country in countries}
+        for country, future in futures.items():
+            try:
+                results[country] = future.result()
+            except Exception as e:
+                print(f'{country}: scrape failed: {e!r}')
+                results[country] = None
+    return results
+
+
+def parse_budgets(values: List[str]) -> Dict[str, int]:
+    '''Parse COUNTRY=N concurrency budgets.'''
+    budgets = {}
+    for value in values:
+        country, _, workers = value.partition('=')
+        if country not in COUNTRY_CONFIGS or not workers.isdigit() or int(workers) < 1:
+            raise argparse.ArgumentTypeError(f'Invalid budget {value!r}, expected COUNTRY=N')
+        budgets[country] = int(workers)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Scrape Indeed for several countries in parallel')
+    parser.add_argument('--countries', nargs='+', choices=list(COUNTRY_CONFIGS),
+                        default=list(COUNTRY_CONFIGS), help='Countries to scrape (default: all)')
+    parser.add_argument('--keywords', nargs='+', default=JOB_SEARCH_KEYWORDS)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'parquet'], default='csv')
+    parser.add_argument('--backend', choices=['http', 'browser'], default='browser')
+    parser.add_argument('--profile', choices=list(scraper.BROWSER_PROFILES), default='lean')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Concurrent searches per country unless set by --budget')
+    parser.add_argument('--budget', nargs='+', default=[], metavar='COUNTRY=N',
+                        help='Per-country concurrency, e.g. USA=4 Sweden=1')
+    parser.add_argument('--cache-dir', default='page_cache', help="Page cache directory, or '' to disable")
+    parser.add_argument('--seen-jobs', default='indeed_seen_jobs.sqlite',
+                        help="Seen-jobs index shared by all countries, or '' to disable")
+    parser.add_argument('--extractor', choices=['xpath', 'embedded'], default='xpath',
+                        help="'embedded' reads listings from the JSON in results pages, "
+                             'skipping most detail pages')
+    parser.add_argument('--two-phase', action='store_true',
+                        help='Write card records first, then fetch detail pages by priority')
+    parser.add_argument('--max-detail-fetches', type=int,
+                        help='Detail page budget per country in two-phase mode')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only fetch postings newer than the last run and append them')
+    parser.add_argument('--metrics', help='Write Prometheus metrics to this file')
+    args = parser.parse_args()
+
+    try:
+        budgets = parse_budgets(args.budget)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.metrics:
+        enable_metrics(args.metrics)
+
+    cache = PageCache(args.cache_dir) if args.cache_dir else None
+    seen_jobs = SeenJobIndex(args.seen_jobs) if args.seen_jobs else None
+    os.makedirs(args.output_dir, exist_ok=True)
+    crawl_state = (CrawlState(os.path.join(args.output_dir, 'crawl_state.sqlite'))
+                   if args.incremental else None)
+    start = time.monotonic()
+    try:
+        results = scrape_countries(args.countries, args.output_dir, budgets, args.workers,
+                                   backend=args.backend, sink_format=args.format,
+                                   job_keywords=args.keywords, cache=cache,
+                                   seen_jobs=seen_jobs, profile=args.profile,
+                                   crawl_state=crawl_state, extractor=args.extractor,
+                                   two_phase=args.two_phase,
+                                   max_detail_fetches=args.max_detail_fetches)
+    finally:
+        if crawl_state is not None:
+            crawl_state.close()
+        if seen_jobs is not None:
+            seen_jobs.close()
+        if cache is not None:
+            cache.close()
+    print(f'Scraped {len(results)} countries in {time.monotonic() - start:.0f} s')
+    METRICS.report()
+    if any(path is None for path in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
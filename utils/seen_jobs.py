@@ -0,0 +1,72 @@
+"""
+Cross-run index of already scraped Indeed postings.
+Stores the detail fields of every job key (jk) fetched so far, so the
+scraper can reuse them instead of loading the same detail page again.
+"""
+
+# Standard library imports
+import json
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS seen_jobs (
+    job_key TEXT PRIMARY KEY,
+    details TEXT NOT NULL,
+    first_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+
+class SeenJobIndex:
+    '''
+    Persistent map from Indeed job key to its scraped detail fields.
+
+    With skip_seen=False (default) a repeated listing is still written,
+    using the cached detail fields; with skip_seen=True it is dropped.
+    '''
+
+    def __init__(self, path: str, skip_seen: bool = False):
+        self.path = path
+        self.skip_seen = skip_seen
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self) -> 'SeenJobIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, job_key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM seen_jobs WHERE job_key = ?',
+                                     (job_key,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM seen_jobs').fetchone()[0]
+
+    def get(self, job_key: str) -> Optional[Dict[str, str]]:
+        '''Return the cached detail fields for a job key, if seen before.'''
+        with self._lock:
+            row = self._conn.execute('SELECT details FROM seen_jobs WHERE job_key = ?',
+                                     (job_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, job_key: str, details: Dict[str, str]) -> None:
+        '''Store the detail fields fetched for a job key.'''
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO seen_jobs (job_key, details) VALUES (?, ?) '
+                'ON CONFLICT(job_key) DO UPDATE SET details = excluded.details',
+                (job_key, json.dumps(details, ensure_ascii=False)))
+            self._conn.commit()
+
+    def close(self) -> None:
+        '''Close the underlying database connection.'''
+        with self._lock:
+            self._conn.close()
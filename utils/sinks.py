@@ -0,0 +1,163 @@
+"""
+Batched output sinks for scraped job records.
+Records are buffered in memory and flushed in batches to CSV, JSON Lines
+or Parquet. Flushes happen every flush_every records or flush_interval
+seconds, optionally followed by an fsync, and appends from several
+threads or processes are serialized with a lock file.
+"""
+
+# Standard library imports
+import csv
+import fcntl
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from typing import List, Optional, Sequence
+
+# Local imports
+from utils.web_scraping_utils import CSV_COLUMNS
+
+
+class RecordSink:
+    '''
+    Base class for batched sinks; subclasses implement _write_batch.
+
+    Sinks expose writerow, so they can be passed to scrape_jobs wherever a
+    csv.writer is accepted.
+    '''
+
+    def __init__(self, path: str, columns: Sequence[str] = CSV_COLUMNS,
+                 flush_every: int = 100, flush_interval: float = 30.0, fsync: bool = False):
+        self.path = path
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.records_written = 0
+        self._buffer: List[list] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'RecordSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def writerow(self, record: Sequence) -> None:
+        '''Buffer one record, flushing when the batch size or interval is reached.'''
+        with self._lock:
+            self._buffer.append(list(record))
+            if (len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def writerows(self, records: Sequence[Sequence]) -> None:
+        '''Buffer several records.'''
+        for record in records:
+            self.writerow(record)
+
+    def flush(self) -> None:
+        '''Write all buffered records.'''
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        batch = self._buffer
+        with open(f'{self.path}.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._write_batch(batch)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        # Only dropped once written, so a failed write raises with the batch still buffered
+        self._buffer = []
+        self.records_written += len(batch)
+
+    def _write_batch(self, batch: List[list]) -> None:
+        raise NotImplementedError
+
+    def _append_bytes(self, data: bytes) -> None:
+        '''Append data with a single write on an O_APPEND descriptor.'''
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        '''Flush remaining records.'''
+        self.flush()
+
+
+class CsvSink(RecordSink):
+    '''Append records to a CSV file, writing the header if the file is new.'''
+
+    def _write_batch(self, batch: List[list]) -> None:
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            csv_writer.writerow(self.columns)
+        csv_writer.writerows(batch)
+        self._append_bytes(buffer.getvalue().encode('utf-8'))
+
+
+class JsonlSink(RecordSink):
+    '''Append records to a JSON Lines file, one object per record.'''
+
+    def _write_batch(self, batch: List[list]) -> None:
+        lines = (json.dumps(dict(zip(self.columns, record)), ensure_ascii=False)
+                 for record in batch)
+        self._append_bytes(''.join(f'{line}\n' for line in lines).encode('utf-8'))
+
+
+class ParquetSink(RecordSink):
+    '''
+    Write records to a Parquet dataset directory, one part file per flush.
+    Part files get unique names, so any number of writers can share the
+    directory; read it back with pandas.read_parquet(path).
+    '''
+
+    def __init__(self, path: str, columns: Sequence[str] = CSV_COLUMNS,
+                 flush_every: int = 5000, flush_interval: float = 300.0, fsync: bool = False):
+        super().__init__(path, columns, flush_every, flush_interval, fsync)
+        os.makedirs(path, exist_ok=True)
+
+    def _write_batch(self, batch: List[list]) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError('ParquetSink requires pyarrow: pip install pyarrow') from e
+
+        table = pa.Table.from_pylist([dict(zip(self.columns, record)) for record in batch])
+        part_path = os.path.join(self.path, f'part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet')
+        tmp_path = f'{part_path}.tmp'
+        pq.write_table(table, tmp_path, compression='zstd')
+        if self.fsync:
+            with open(tmp_path, 'rb') as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, part_path)
+
+
+SINK_TYPES = {
+    'csv': CsvSink,
+    'jsonl': JsonlSink,
+    'parquet': ParquetSink,
+}
+
+
+def open_sink(path: str, sink_format: Optional[str] = None, **kwargs) -> RecordSink:
+    '''Create a sink for path, inferring the format from its extension if not given.'''
+    sink_format = sink_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if sink_format not in SINK_TYPES:
+        raise ValueError(f'Unsupported sink format: {sink_format}')
+    return SINK_TYPES[sink_format](path, **kwargs)
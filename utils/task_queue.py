@@ -0,0 +1,351 @@
+"""
+Durable SQLite work queue for distributed scraping.
+Breaks a crawl into independent search, results-page and detail-page
+tasks that any number of worker processes can lease, retry and complete.
+Workers on other hosts can share the queue through a common database
+file on a network filesystem with working file locks, opened with
+shared=True (--shared), which uses SQLite's rollback journal: the default
+WAL mode needs shared memory and only works for workers on one host.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Local imports
+import utils.web_scraping_utils as scraper
+from utils.metrics import METRICS, enable_metrics
+from utils.sinks import open_sink
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, available_at);
+'''
+
+
+class Task(NamedTuple):
+    '''A leased unit of work.'''
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class TaskQueue:
+    '''
+    Work queue with leasing, retries and visibility timeouts.
+
+    A leased task is invisible to other workers for visibility_timeout
+    seconds; if its worker neither completes nor fails it in time, it
+    becomes available again. Failed tasks are retried with a growing delay
+    until max_attempts, after which they are kept with status 'failed';
+    the same applies to tasks whose lease expired on their last attempt.
+    With shared=True the database uses the rollback journal instead of WAL,
+    so it can live on a network filesystem used by workers on several hosts.
+    '''
+
+    def __init__(self, path: str, visibility_timeout: float = 300.0,
+                 max_attempts: int = 3, retry_delay: float = 30.0, shared: bool = False):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(f"PRAGMA journal_mode={'DELETE' if shared else 'WAL'}")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self) -> 'TaskQueue':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def put(self, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None) -> bool:
+        '''Add a task; returns False if a task with the same dedupe_key exists.'''
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO tasks (kind, payload, dedupe_key, available_at) '
+                'VALUES (?, ?, ?, ?)',
+                (kind, json.dumps(payload, ensure_ascii=False), dedupe_key, time.time()))
+        return cursor.rowcount == 1
+
+    def get_payload(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        '''Return the payload of the task with a dedupe_key, or None if there is none.'''
+        with self._lock:
+            row = self._conn.execute('SELECT payload FROM tasks WHERE dedupe_key = ?',
+                                     (dedupe_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def lease(self, worker_id: str, limit: int = 1, kind: Optional[str] = None) -> List[Task]:
+        '''Lease up to limit available tasks, optionally of a single kind.'''
+        now = time.time()
+        kind_filter = 'AND kind = ?' if kind else ''
+        params = [now, now] + ([kind] if kind else []) + [limit]
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # A task whose worker died on its last attempt is not retried
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'failed', last_error = ?, "
+                    'lease_owner = NULL, lease_expires = NULL '
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    ('Lease expired', now, self.max_attempts))
+                rows = self._conn.execute(
+                    'SELECT id, kind, payload, attempts FROM tasks '
+                    "WHERE ((status = 'pending' AND available_at <= ?) "
+                    "    OR (status = 'leased' AND lease_expires < ?)) "
+                    f'{kind_filter} ORDER BY id LIMIT ?', params).fetchall()
+                self._conn.executemany(
+                    "UPDATE tasks SET status = 'leased', attempts = attempts + 1, "
+                    'lease_owner = ?, lease_expires = ? WHERE id = ?',
+                    [(worker_id, now + self.visibility_timeout, row[0]) for row in rows])
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return [Task(task_id, task_kind, json.loads(payload), attempts + 1)
+                for task_id, task_kind, payload, attempts in rows]
+
+    def complete(self, task: Task, worker_id: str) -> None:
+        '''Mark a leased task as done.'''
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, lease_expires = NULL "
+                'WHERE id = ? AND lease_owner = ?', (task.id, worker_id))
+
+    def fail(self, task: Task, worker_id: str, error: str) -> None:
+        '''Release a leased task for retry, or mark it failed after max_attempts.'''
+        if task.attempts >= self.max_attempts:
+            status, available_at = 'failed', time.time()
+        else:
+            status, available_at = 'pending', time.time() + self.retry_delay * task.attempts
+        with self._lock:
+            self._conn.execute(
+                'UPDATE tasks SET status = ?, available_at = ?, last_error = ?, '
+                'lease_owner = NULL, lease_expires = NULL WHERE id = ? AND lease_owner = ?',
+                (status, available_at, error, task.id, worker_id))
+
+    def counts(self) -> Dict[str, int]:
+        '''Return the number of tasks per status.'''
+        with self._lock:
+            return dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+
+    def is_drained(self) -> bool:
+        '''Check whether no task is pending or leased.'''
+        counts = self.counts()
+        return counts.get('pending', 0) + counts.get('leased', 0) == 0
+
+    def close(self) -> None:
+        '''Close the database connection.'''
+        with self._lock:
+            self._conn.close()
+
+
+def enqueue_searches(queue: TaskQueue, job_keywords: List[str], location_keywords: List[str],
+                     selected_country: str, base_url: str) -> int:
+    '''Add one search task per keyword/location combination; returns tasks added.'''
+    added = 0
+    for job_keyword in job_keywords:
+        for location_keyword in location_keywords:
+            payload = dict(job_keyword=job_keyword, location_keyword=location_keyword,
+                           selected_country=selected_country, base_url=base_url)
+            added += queue.put('search', payload,
+                               f'search|{selected_country}|{job_keyword}|{location_keyword}')
+    return added
+
+
+def _search_key(payload: Dict[str, Any]) -> str:
+    return '|'.join([payload['selected_country'], payload['job_keyword'],
+                     payload['location_keyword']])
+
+
+def _enqueue_page(queue: TaskQueue, search: Dict[str, Any], page_no: int, total_pages: int) -> None:
+    payload = dict(search, page_no=page_no, total_pages=total_pages)
+    queue.put('page', payload, f'page|{_search_key(search)}|{page_no}')
+
+
+def handle_search(queue: TaskQueue, task: Task, backend) -> None:
+    '''
+    Count the result pages of a search and enqueue its first page. Raises
+    if the count page can't be loaded or read, so the task is retried.
+    '''
+    search = task.payload
+    total_pages = scraper.get_total_pages(None, search['job_keyword'], search['location_keyword'],
+                                          search['base_url'], backend, raise_errors=True)
+    if total_pages > 0:
+        _enqueue_page(queue, search, 0, total_pages)
+
+
+def handle_page(queue: TaskQueue, task: Task, backend) -> None:
+    '''
+    Extract the job cards of a results page and enqueue a detail task per
+    new job. The next page is only enqueued if this page brought new jobs:
+    jobs without a detail task yet, or whose task this page added in an
+    earlier attempt.
+    '''
+    page = task.payload
+    url = scraper.get_search_url(page['base_url'], page['job_keyword'],
+                                 page['location_keyword'], page['page_no'])
+    page_dom = backend.get_dom(url)
+    if page_dom is None:
+        raise RuntimeError(f'Failed to load {url}')
+
+    search = {key: page[key] for key in
+              ('job_keyword', 'location_keyword', 'selected_country', 'base_url')}
+    new_jobs = 0
+    for card in scraper.extract_job_cards(page_dom):
+        job_key = scraper.get_job_key(card.job_link)
+        payload = dict(search, page_no=page['page_no'], card=list(card))
+        dedupe_key = f'detail|{_search_key(search)}|{job_key}'
+        # A retried page finds the detail tasks it added before it failed
+        if queue.put('detail', payload, dedupe_key) or queue.get_payload(dedupe_key) == payload:
+            new_jobs += 1
+    print(f"New jobs on page {page['page_no'] + 1} for {page['job_keyword']} "
+          f"in {page['location_keyword']}: {new_jobs}")
+
+    if new_jobs and page['page_no'] + 1 < page['total_pages']:
+        _enqueue_page(queue, search, page['page_no'] + 1, page['total_pages'])
+
+
+def handle_details(tasks: List[Task], backend, csv_writer, write_lock: threading.Lock,
+                   seen_jobs=None) -> List[Task]:
+    '''
+    Fetch the detail pages of a batch of detail tasks and write their
+    records. Returns the tasks whose detail page failed to load; nothing is
+    written for them.
+    '''
+    cards = [scraper.JobCard(*task.payload['card']) for task in tasks]
+    job_links = [task.payload['base_url'] + card.job_link for task, card in zip(tasks, cards)]
+    jobs_details, loaded = scraper.fetch_jobs_details(job_links, backend=backend,
+                                                      seen_jobs=seen_jobs)
+    failed = []
+    for task, card, details, ok in zip(tasks, cards, jobs_details, loaded):
+        if not ok:
+            failed.append(task)
+            continue
+        payload = task.payload
+        record = scraper.process_card(card, payload['page_no'], payload['job_keyword'],
+                                      payload['location_keyword'], payload['selected_country'],
+                                      payload['base_url'], details)
+        with write_lock:
+            csv_writer.writerow(record)
+    # Persist the batch before its tasks are completed
+    if hasattr(csv_writer, 'flush'):
+        csv_writer.flush()
+    return failed
+
+
+def run_worker(queue: TaskQueue, backend, csv_writer, worker_id: Optional[str] = None,
+               detail_batch: int = 8, poll_interval: float = 5.0,
+               exit_when_drained: bool = True, seen_jobs=None) -> None:
+    '''
+    Lease and process tasks until the queue is drained.
+    Detail tasks are leased in batches so the backend can fetch them
+    concurrently; search and page tasks are leased one at a time. Failed
+    tasks, including detail tasks whose page didn't load, are retried.
+    '''
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    write_lock = threading.Lock()
+    while True:
+        tasks = queue.lease(worker_id, kind='search') or queue.lease(worker_id, kind='page')
+        if not tasks:
+            tasks = queue.lease(worker_id, limit=detail_batch, kind='detail')
+        if not tasks:
+            if exit_when_drained and queue.is_drained():
+                print(f'Worker {worker_id}: queue drained, stopping')
+                return
+            time.sleep(poll_interval)
+            continue
+
+        failed = []
+        try:
+            if tasks[0].kind == 'search':
+                handle_search(queue, tasks[0], backend)
+            elif tasks[0].kind == 'page':
+                handle_page(queue, tasks[0], backend)
+            else:
+                failed = handle_details(tasks, backend, csv_writer, write_lock, seen_jobs)
+        except Exception as e:
+            print(f'Worker {worker_id}: {tasks[0].kind} task failed: {e}')
+            for task in tasks:
+                queue.fail(task, worker_id, repr(e))
+            continue
+        if failed:
+            print(f'Worker {worker_id}: {len(failed)} detail pages failed to load')
+        failed_ids = {task.id for task in failed}
+        for task in tasks:
+            if task.id in failed_ids:
+                queue.fail(task, worker_id, 'Failed to load detail page')
+            else:
+                queue.complete(task, worker_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Distributed Indeed scraping queue')
+    parser.add_argument('--db', default='scrape_queue.sqlite', help='Queue database path')
+    parser.add_argument('--shared', action='store_true',
+                        help='Database is on a network filesystem shared by several hosts')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Add search tasks')
+    enqueue_parser.add_argument('--country', required=True)
+    enqueue_parser.add_argument('--base-url', required=True)
+    enqueue_parser.add_argument('--keywords', nargs='+', required=True)
+    enqueue_parser.add_argument('--locations', nargs='+', required=True)
+
+    worker_parser = subparsers.add_parser('worker', help='Drain the queue')
+    worker_parser.add_argument('--output', required=True,
+                               help='Output .csv, .jsonl or .parquet path, shareable between workers')
+    worker_parser.add_argument('--backend', choices=['http', 'browser'], default='http')
+    worker_parser.add_argument('--browsers', type=int, default=1)
+    worker_parser.add_argument('--metrics', help='Write Prometheus metrics to this file')
+
+    subparsers.add_parser('status', help='Show task counts')
+
+    args = parser.parse_args()
+    with TaskQueue(args.db, shared=args.shared) as queue:
+        if args.command == 'enqueue':
+            added = enqueue_searches(queue, args.keywords, args.locations,
+                                     args.country, args.base_url)
+            print(f'Added {added} search tasks')
+        elif args.command == 'status':
+            print(queue.counts())
+        else:
+            if args.metrics:
+                enable_metrics(args.metrics)
+            if args.backend == 'http':
+                from utils.http_fetcher import AsyncFetcher
+                backend = AsyncFetcher()
+            else:
+                from utils.driver_pool import DriverPool
+                backend = DriverPool(size=args.browsers)
+            try:
+                with open_sink(args.output) as sink:
+                    run_worker(queue, backend, sink)
+            finally:
+                backend.close()
+            METRICS.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,18 @@ and data extraction from job listings.
 """
 
 # Standard library imports
+import json
 import math
 import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from csv import writer
-from typing import Optional, Union, List
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
 
 # Third-party library imports
-from bs4 import BeautifulSoup
 from lxml import etree as et
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
@@ -24,179 +27,757 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.firefox import GeckoDriverManager
 
-# Global variables
-_driver: Optional[webdriver.Firefox] = None
+# Local imports
+from utils.metrics import METRICS
+from utils.page_cache import PageCache, fetch_through_cache
+from utils.rate_limiter import AdaptiveRateLimiter, is_blocked_page
+
+# Output columns, in the order process_job returns them
+CSV_COLUMNS = [
+    'page', 'country', 'job_link', 'search_keyword', 'search_location',
+    'job_title', 'company_name', 'company_location', 'salary', 'job_description'
+]
+
+
+# Precompiled XPath expressions for results and detail pages
+JOB_CARDS_XPATH = et.XPath('//div[@class="job_seen_beacon"]')
+JOB_LINK_XPATH = et.XPath('./descendant::h2/a/@href')
+JOB_TITLE_XPATH = et.XPath('./descendant::h2/a/span/text()')
+COMPANY_NAME_XPATH = et.XPath('.//span[@data-testid="company-name"]/text()')
+COMPANY_LOCATION_XPATH = et.XPath('.//div[@data-testid="text-location"]/text()')
+JOB_COUNT_XPATH = et.XPath(
+    '//div[contains(@class, "jobsearch-JobCountAndSortPane-jobCount")]//text()')
+JOB_DESC_XPATH = et.XPath('//*[@id="jobDescriptionText"]//text()')
+SALARY_XPATH = et.XPath('//*[@id="salaryInfoAndJobType"]//text()')
+
+# Results pages embed their job cards as JSON assigned in an inline script
+EMBEDDED_JOBS_MARKER = 'window.mosaic.providerData["mosaic-provider-jobcards"]'
+EMBEDDED_JOBS_XPATH = et.XPath(f"//script[contains(text(), '{EMBEDDED_JOBS_MARKER}')]/text()")
+_JSON_DECODER = json.JSONDecoder()
+
+_HTML_PARSER = et.HTMLParser(encoding='utf-8')
+
+# Firefox preferences that stop downloads the scraper never reads
+_BLOCK_RESOURCES = {
+    'permissions.default.image': 2,
+    'permissions.default.stylesheet': 2,
+    'media.autoplay.default': 5,
+    'media.autoplay.blocking_policy': 2,
+    'browser.display.use_document_fonts': 0,
+    'gfx.downloadable_fonts.enabled': False,
+    'privacy.trackingprotection.enabled': True,
+}
+_DISABLE_CACHES_AND_EXTENSIONS = {
+    'browser.cache.disk.enable': False,
+    'browser.cache.memory.enable': False,
+    'browser.cache.offline.enable': False,
+    'network.http.use-cache': False,
+    'extensions.update.enabled': False,
+    'xpinstall.enabled': False,
+    'app.update.enabled': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'toolkit.telemetry.enabled': False,
+}
+_MEMORY_CAPS = {
+    'dom.ipc.processCount': 1,
+    'fission.autostart': False,
+    'browser.sessionhistory.max_entries': 2,
+    'browser.sessionhistory.max_total_viewers': 0,
+    'browser.sessionstore.max_tabs_undo': 0,
+    'image.mem.max_decoded_image_kb': 1024,
+}
+
+# Named browser performance profiles accepted by initialize_driver
+BROWSER_PROFILES = {
+    # Full headed Firefox, as used for the original scrapes
+    'default': {},
+    'headless': {'headless': True},
+    # Headless, returns once the DOM is ready and skips images, media and fonts
+    'lean': {
+        'headless': True,
+        'page_load_strategy': 'eager',
+        'preferences': {**_BLOCK_RESOURCES, **_DISABLE_CACHES_AND_EXTENSIONS},
+    },
+    # Lean plus a single content process and small history and image caches
+    'minimal': {
+        'headless': True,
+        'page_load_strategy': 'eager',
+        'preferences': {**_BLOCK_RESOURCES, **_DISABLE_CACHES_AND_EXTENSIONS, **_MEMORY_CAPS},
+    },
+}
+
+# Step of the `start` query parameter between consecutive results pages.
+# Indeed shows around 15 cards per page, so consecutive pages overlap and
+# pages are counted by this stride rather than by the cards shown.
+PAGE_STRIDE = 10
+
+
+class JobCard(NamedTuple):
+    '''Fields of one job_seen_beacon card on a results page.'''
+    job_link: str
+    job_title: str
+    company_name: str
+    company_location: str
 
 
 # Basic helper functions 
-def get_job_link(job: et._Element) -> str:
-    '''Extract job link from job element.'''
+def _first_match(xpath: et.XPath, job: et._Element) -> str:
+    '''Return the first result of a compiled XPath, or 'Not available'.'''
     try:
-        return job.xpath('./descendant::h2/a/@href')[0]
+        return str(xpath(job)[0])
     except Exception:
         return 'Not available'
 
 
+def get_job_link(job: et._Element) -> str:
+    '''Extract job link from job element.'''
+    return _first_match(JOB_LINK_XPATH, job)
+
+
+def get_job_key(job_link: str) -> str:
+    '''Extract the Indeed job key (jk parameter) from a job link.'''
+    job_key = parse_qs(urlsplit(job_link).query).get('jk')
+    return job_key[0] if job_key else job_link
+
+
 def get_job_title(job: et._Element) -> str:
     '''Extract job title from job element.'''
-    try:
-        job_title = job.xpath('./descendant::h2/a/span/text()')[0]
-    except Exception:
-        job_title = 'Not available'
-    return job_title
+    return _first_match(JOB_TITLE_XPATH, job)
 
 
 def get_company_name(job: et._Element) -> str:
     '''Extract company name from job element.'''
-    try:
-        company_name = job.xpath('.//span[@data-testid="company-name"]/text()')[0]
-    except Exception:
-        company_name = 'Not available'
-    return company_name
+    return _first_match(COMPANY_NAME_XPATH, job)
 
 
 def get_company_location(job: et._Element) -> str:
     '''Extract company location from job element.'''
-    try:
-        company_location = job.xpath('.//div[@data-testid="text-location"]/text()')[0]
-    except Exception:
-        company_location = 'Not available'
-    return company_location
+    return _first_match(COMPANY_LOCATION_XPATH, job)
+
+
+def extract_job_card(job: et._Element) -> JobCard:
+    '''Extract every card field of a single job element.'''
+    return JobCard(get_job_link(job), get_job_title(job),
+                   get_company_name(job), get_company_location(job))
+
+
+def extract_job_cards(page_dom: et._Element) -> List[JobCard]:
+    '''Extract all job cards of a results page in one pass.'''
+    return [extract_job_card(job) for job in JOB_CARDS_XPATH(page_dom)]
+
+
+def extract_embedded_jobs(page_dom: et._Element) -> Optional[List[Dict[str, Any]]]:
+    '''
+    Return the job results embedded as JSON in a results page, or None if
+    the page has no such payload or it can't be decoded.
+    '''
+    for script in EMBEDDED_JOBS_XPATH(page_dom):
+        try:
+            start = script.index('{', script.index(EMBEDDED_JOBS_MARKER))
+            provider_data, _ = _JSON_DECODER.raw_decode(script, start)
+            return provider_data['metaData']['mosaicProviderJobCardsModel']['results']
+        except (ValueError, KeyError, TypeError):
+            continue
+    return None
+
+
+def _embedded_text(value: Any) -> str:
+    '''Return the text of an embedded string or HTML fragment, or 'Not available'.'''
+    if not value or not isinstance(value, str):
+        return 'Not available'
+    if '<' in value:
+        fragment = et.fromstring(value.encode('utf-8'), parser=_HTML_PARSER)
+        value = ' '.join(text.strip() for text in fragment.itertext() if text.strip())
+    return value.strip() or 'Not available'
+
+
+def embedded_job_card(result: Dict[str, Any]) -> JobCard:
+    '''Build a job card from one embedded job result.'''
+    return JobCard(f"/viewjob?jk={result['jobkey']}",
+                   _embedded_text(result.get('displayTitle') or result.get('title')),
+                   _embedded_text(result.get('company')),
+                   _embedded_text(result.get('formattedLocation')))
+
+
+def embedded_job_details(result: Dict[str, Any]) -> Dict[str, str]:
+    '''
+    Build the detail fields of one embedded job result. The description is
+    the snippet shown on the card, not the full text of the detail page.
+    '''
+    salary_snippet = result.get('salarySnippet') or {}
+    return {
+        'salary': _embedded_text(salary_snippet.get('text')),
+        'job_description': _embedded_text(result.get('snippet')),
+    }
+
+
+def extract_listings(page_dom: et._Element,
+                     extractor: str = 'xpath') -> Tuple[List[JobCard], Dict[str, Dict[str, str]]]:
+    '''
+    Extract the job cards of a results page, and the detail fields found on
+    the page itself, keyed by job key. The 'embedded' extractor reads cards,
+    salaries and description snippets from the page's JSON payload and falls
+    back to the XPath card getters when there is none; the 'xpath'
+    extractor only reads the rendered cards.
+    '''
+    if extractor == 'embedded':
+        results = extract_embedded_jobs(page_dom)
+        if results is not None:
+            results = [result for result in results if result.get('jobkey')]
+            return ([embedded_job_card(result) for result in results],
+                    {result['jobkey']: embedded_job_details(result) for result in results})
+        METRICS.incr('embedded_jobs_missing')
+    elif extractor != 'xpath':
+        raise ValueError(f'Unknown extractor: {extractor}')
+    return extract_job_cards(page_dom), {}
 
 
 # Core browser and DOM manipulation functions
-def initialize_driver() -> webdriver.Firefox:
-    '''Initialize and return a Firefox WebDriver instance.'''
-    global _driver
+def parse_dom(page_content: str) -> Optional[et._Element]:
+    '''Parse raw page source into an lxml DOM with a single parse.'''
+    with METRICS.timer('parse'):
+        return et.fromstring(page_content.encode('utf-8'), parser=_HTML_PARSER)
+
+
+def get_browser_options(profile: str = 'default') -> Options:
+    '''Build Firefox options for a named profile from BROWSER_PROFILES.'''
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f'Unknown browser profile: {profile}')
+    settings = BROWSER_PROFILES[profile]
     options = Options()
+    if settings.get('headless'):
+        options.add_argument('-headless')
+    if 'page_load_strategy' in settings:
+        options.page_load_strategy = settings['page_load_strategy']
+    for name, value in settings.get('preferences', {}).items():
+        options.set_preference(name, value)
+    return options
+
+
+def initialize_driver(profile: str = 'default') -> webdriver.Firefox:
+    '''Initialize and return a Firefox WebDriver instance using a browser profile.'''
+    options = get_browser_options(profile)
     service = Service(GeckoDriverManager().install())
-    _driver = webdriver.Firefox(service=service, options=options)
-    return _driver
+    return webdriver.Firefox(service=service, options=options)
 
 
-def get_dom(url: str, driver: Optional[webdriver.Firefox] = None) -> Optional[et._Element]:
-    '''Get DOM from the given URL.'''
-    global _driver
-    if driver:
-        _driver = driver
+def fetch_page_source(url: str, driver: webdriver.Firefox,
+                      rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                      raise_errors: bool = False) -> Optional[str]:
+    '''
+    Load the given URL in the WebDriver and return its page source.
+    With a rate limiter, waits for the host's next request slot and reports
+    the outcome back to it; otherwise sleeps a fixed random 2-5 s.
+    Returns None if a block page is served, and also if the browser fails
+    unless raise_errors is set, in which case the WebDriverException is
+    re-raised; replacing a dead driver is left to the caller
+    (see utils.driver_pool.DriverPool).
+    '''
+    if rate_limiter is not None:
+        with METRICS.timer('rate_limit_wait'):
+            rate_limiter.wait(url)
+    start = time.perf_counter()
     try:
-        if not _driver:
-            _driver = initialize_driver()
-        _driver.get(url)
-        wait = WebDriverWait(_driver, 10)
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-        time.sleep(random.uniform(2, 5))
-        page_content = _driver.page_source
-        product_soup = BeautifulSoup(page_content, 'html.parser')
-        dom = et.HTML(str(product_soup))
-        return dom
+        with METRICS.timer('driver_get'):
+            driver.get(url)
+        with METRICS.timer('wait_body'):
+            wait = WebDriverWait(driver, 10)
+            wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+        with METRICS.timer('page_source'):
+            page_content = driver.page_source
     except WebDriverException as e:
-        print('WebDriver disconnected, restarting the browser:', e)
-        if _driver:
-            _driver.quit()
-        _driver = initialize_driver()
+        print('WebDriver error while loading page:', e)
+        METRICS.incr('page_failures')
+        if rate_limiter is not None:
+            rate_limiter.record(url, time.perf_counter() - start, ok=False)
+        if raise_errors:
+            raise
+        return None
+
+    blocked = is_blocked_page(page_content)
+    if rate_limiter is not None:
+        rate_limiter.record(url, time.perf_counter() - start, blocked=blocked)
+    else:
+        with METRICS.timer('sleep'):
+            time.sleep(random.uniform(2, 5))
+    if blocked:
+        print(f'Block page served for {url}')
+        METRICS.incr('blocked_pages')
+        return None
+    METRICS.incr('pages_loaded')
+    return page_content
+
+
+def get_dom(url: str, driver: Optional[webdriver.Firefox],
+            rate_limiter: Optional[AdaptiveRateLimiter] = None,
+            cache: Optional[PageCache] = None) -> Optional[et._Element]:
+    '''
+    Get DOM from the given URL using the given WebDriver.
+    With a page cache, cached pages are parsed without loading them and new
+    pages are stored; a cache in replay mode is the only source of pages,
+    so no driver is needed. Without a driver, pages missing from the cache
+    come back as None.
+    '''
+    page_content = fetch_through_cache(
+        url, cache, lambda page_url: _load_page_source(page_url, driver, rate_limiter))
+    return parse_dom(page_content) if page_content is not None else None
+
+
+def _load_page_source(url: str, driver: Optional[webdriver.Firefox],
+                      rate_limiter: Optional[AdaptiveRateLimiter] = None) -> Optional[str]:
+    if driver is None:
+        print(f'No WebDriver to load {url}, only cached pages can be served')
+        METRICS.incr('page_failures')
         return None
+    return fetch_page_source(url, driver, rate_limiter)
+
+
+def load_dom(url: str, driver: Optional[webdriver.Firefox] = None,
+             backend=None, cache: Optional[PageCache] = None) -> Optional[et._Element]:
+    '''
+    Load a page through the fetch backend if given, else the WebDriver and
+    the optional page cache (backends have their own).
+    '''
+    if backend is not None:
+        return backend.get_dom(url)
+    return get_dom(url, driver, cache=cache)
 
 
 # Main data extraction functions
-def get_total_pages(driver: webdriver.Firefox, 
+def parse_job_count(job_count_text: str) -> int:
+    '''Parse the number of jobs from the job count pane text.'''
+    return int(''.join(re.findall(r'\d+', job_count_text)))
+
+
+def get_job_count_text(dom: et._Element) -> str:
+    '''Extract the job count pane text from a search results page.'''
+    return ' '.join(JOB_COUNT_XPATH(dom)).strip()
+
+
+def get_search_url(base_url: str, job_keyword: str, location_keyword: str,
+                   page_no: int = 0, sort_by_date: bool = False,
+                   max_age_days: Optional[int] = None) -> str:
+    '''
+    Build the URL of a results page for a keyword/location search,
+    optionally newest first and limited to postings from the last days.
+    '''
+    url = f'{base_url}/jobs?q={job_keyword}&l={location_keyword}'
+    if sort_by_date:
+        url += '&sort=date'
+    if max_age_days is not None:
+        url += f'&fromage={max_age_days}'
+    return f'{url}&start={page_no * PAGE_STRIDE}' if page_no else url
+
+
+def get_total_pages(driver: Optional[webdriver.Firefox], 
                    job_keyword: str, 
                    location_keyword: str, 
-                   base_url: str) -> int:
-    '''Calculate total number of pages for job search results.'''
-    url = f'{base_url}/jobs?q={job_keyword}&l={location_keyword}'
-    driver.get(url)
+                   base_url: str,
+                   backend=None,
+                   raise_errors: bool = False,
+                   cache: Optional[PageCache] = None,
+                   **search_options) -> int:
+    '''
+    Calculate an upper bound on the number of results pages for a search.
+    scrape_search stops earlier once a page brings no new jobs.
+    The first results page is loaded as by load_dom, so it is served from
+    the page cache when cached. search_options are passed on to get_search_url.
+    Returns 0 for a search without results, and also if the page can't be
+    loaded or its job count read, unless raise_errors is set, in which case
+    the error is raised so callers can tell a failure from an empty search.
+    '''
+    url = get_search_url(base_url, job_keyword, location_keyword, **search_options)
+    with METRICS.timer('get_total_pages'):
+        return _get_total_pages(driver, url, backend, raise_errors, cache)
+
+
+def _get_total_pages(driver: Optional[webdriver.Firefox], url: str, backend=None,
+                     raise_errors: bool = False, cache: Optional[PageCache] = None) -> int:
     try:
-        wait = WebDriverWait(driver, 15)
-        job_count_element = wait.until(
-            EC.presence_of_element_located((By.XPATH, 
-                '//div[contains(@class, "jobsearch-JobCountAndSortPane-jobCount")]'))
-        )
-        job_count_text = job_count_element.text
+        dom = load_dom(url, driver, backend, cache)
+        if dom is None:
+            raise RuntimeError(f'Failed to load {url}')
+        job_count_text = get_job_count_text(dom)
         print(f'Job count text: {job_count_text}')
         
-        job_count = int(''.join(re.findall(r'\d+', job_count_text)))
+        job_count = parse_job_count(job_count_text)
         print(f'Parsed job count: {job_count}')
         
         if job_count == 0:
             print('No jobs found.')
             return 0
         
-        jobs_per_page = 15
-        total_pages = math.ceil(job_count / jobs_per_page)
+        total_pages = math.ceil(job_count / PAGE_STRIDE)
         return total_pages
     except Exception as e:
         print(f'Error extracting job count: {e}')
+        METRICS.incr('job_count_failures')
+        if raise_errors:
+            raise
         return 0
 
-def get_job_desc(job_link: str) -> str:
-    '''Extract job description from job link.'''
-    job_dom = get_dom(job_link)
+def extract_job_desc(job_dom: Optional[et._Element]) -> str:
+    '''Extract job description from a parsed job detail page.'''
     try:
-        job_desc = job_dom.xpath('//*[@id="jobDescriptionText"]//text()')
+        job_desc = JOB_DESC_XPATH(job_dom)
         return ' '.join(job_desc).strip() if job_desc else 'Not available'
     except Exception:
         return 'Not available'
 
 
-def get_salary(job_link: str) -> str:
-    '''Extract salary information from job link.'''
-    job_dom = get_dom(job_link)
+def extract_salary(job_dom: Optional[et._Element]) -> str:
+    '''Extract salary information from a parsed job detail page.'''
     try:
-        salary = job_dom.xpath('//*[@id="salaryInfoAndJobType"]//text()')
+        salary = SALARY_XPATH(job_dom)
         return ' '.join(salary).strip() if salary else 'Not available'
     except Exception:
         return 'Not available'
 
-# Main scraping/orchestration functions
-def process_job(job: et._Element, page_no: int, job_keyword: str, 
-                location_keyword: str, selected_country: str, base_url: str) -> list:
+
+# Field getters applied to a job detail page, in output column order
+DETAIL_FIELDS: Dict[str, Callable[[Optional[et._Element]], str]] = {
+    'salary': extract_salary,
+    'job_description': extract_job_desc,
+}
+
+
+def extract_job_details(job_dom: Optional[et._Element]) -> Dict[str, str]:
+    '''Run every detail field getter against one parsed job detail page.'''
+    return {field: getter(job_dom) for field, getter in DETAIL_FIELDS.items()}
+
+
+def get_job_details(job_link: str, driver: Optional[webdriver.Firefox] = None,
+                    backend=None, cache: Optional[PageCache] = None) -> Dict[str, str]:
+    '''Load a job detail page once and extract every detail field from it.'''
+    return extract_job_details(load_dom(job_link, driver, backend, cache))
+
+
+def lookup_jobs_details(job_keys: List[str], seen_jobs=None,
+                        page_details: Optional[Dict[str, Dict[str, str]]] = None
+                        ) -> List[Optional[Dict[str, str]]]:
     '''
-    Process a single job listing and return its data as a list.
+    Return the detail fields known without loading a detail page: cached
+    in seen_jobs (utils.seen_jobs.SeenJobIndex), or read from the results
+    page by extract_listings with a description. Unknown jobs get None.
+    '''
+    jobs_details = [seen_jobs.get(job_key) if seen_jobs is not None else None
+                    for job_key in job_keys]
+    METRICS.incr('detail_cache_hits', sum(details is not None for details in jobs_details))
+    if page_details:
+        for i, job_key in enumerate(job_keys):
+            details = page_details.get(job_key)
+            if (jobs_details[i] is None and details is not None
+                    and details['job_description'] != 'Not available'):
+                jobs_details[i] = details
+                METRICS.incr('embedded_details')
+    return jobs_details
+
+
+def fetch_jobs_details(job_links: List[str], driver: Optional[webdriver.Firefox] = None,
+                       backend=None, seen_jobs=None,
+                       page_details: Optional[Dict[str, Dict[str, str]]] = None,
+                       cache: Optional[PageCache] = None
+                       ) -> Tuple[List[Dict[str, str]], List[bool]]:
+    '''
+    Fetch detail fields for several job links: concurrently through a fetch
+    backend, or one by one with the WebDriver and the optional page cache.
+    Jobs already in seen_jobs (utils.seen_jobs.SeenJobIndex) reuse their
+    cached fields instead of loading the page again; newly loaded pages are
+    added to the index. page_details holds fields read from the results
+    page by extract_listings; jobs whose description was found there are
+    not loaded. Returns the fields of each job and whether they are known,
+    False where the detail page failed to load ('Not available' fields).
+    '''
+    job_keys = [get_job_key(job_link) for job_link in job_links]
+    jobs_details = lookup_jobs_details(job_keys, seen_jobs, page_details)
+    to_fetch = [i for i, details in enumerate(jobs_details) if details is None]
+    loaded = [True] * len(job_links)
+    
+    with METRICS.timer('fetch_details'):
+        if backend is not None:
+            job_doms = backend.get_doms([job_links[i] for i in to_fetch])
+        else:
+            job_doms = []
+            for i in to_fetch:
+                job_doms.append(get_dom(job_links[i], driver, cache=cache))
+    
+    for i, job_dom in zip(to_fetch, job_doms):
+        jobs_details[i] = extract_job_details(job_dom)
+        loaded[i] = job_dom is not None
+        if seen_jobs is not None and job_dom is not None:
+            seen_jobs.add(job_keys[i], jobs_details[i])
+    return jobs_details, loaded
+
+
+def get_jobs_details(job_links: List[str], driver: Optional[webdriver.Firefox] = None,
+                     backend=None, seen_jobs=None,
+                     page_details: Optional[Dict[str, Dict[str, str]]] = None,
+                     cache: Optional[PageCache] = None) -> List[Dict[str, str]]:
     '''
-    job_link = base_url + get_job_link(job)
+    Fetch detail fields for several job links (see fetch_jobs_details);
+    jobs whose detail page failed to load get 'Not available' fields.
+    '''
+    return fetch_jobs_details(job_links, driver, backend, seen_jobs, page_details, cache)[0]
+
+
+def get_job_desc(job_link: str, driver: webdriver.Firefox) -> str:
+    '''Extract job description from job link.'''
+    return extract_job_desc(get_dom(job_link, driver))
+
+
+def get_salary(job_link: str, driver: webdriver.Firefox) -> str:
+    '''Extract salary information from job link.'''
+    return extract_salary(get_dom(job_link, driver))
+
+# Main scraping/orchestration functions
+def process_card(card: JobCard, page_no: int, job_keyword: str, 
+                 location_keyword: str, selected_country: str, base_url: str,
+                 details: Dict[str, str]) -> list:
+    '''Combine an extracted job card and its detail fields into one record.'''
     return [
         page_no + 1,
         selected_country,
-        job_link,
+        base_url + card.job_link,
         job_keyword,
         location_keyword,
-        get_job_title(job),
-        get_company_name(job),
-        get_company_location(job),
-        get_salary(job_link),
-        get_job_desc(job_link)
+        card.job_title,
+        card.company_name,
+        card.company_location,
+        details['salary'],
+        details['job_description']
     ]
 
 
-def scrape_jobs(csv_writer, driver: webdriver.Firefox, job_keywords: List[str], 
-                location_keywords: List[str], selected_country: str, base_url: str) -> None:
+def process_job(job: et._Element, page_no: int, job_keyword: str, 
+                location_keyword: str, selected_country: str, base_url: str,
+                driver: Optional[webdriver.Firefox] = None,
+                details: Optional[Dict[str, str]] = None,
+                backend=None, cache: Optional[PageCache] = None) -> list:
+    '''
+    Process a single job listing and return its data as a list.
+    Detail fields are fetched from the job link unless already provided,
+    through the fetch backend if given, else the WebDriver and the optional
+    page cache; one of them is then required.
+    '''
+    if details is None and driver is None and backend is None and cache is None:
+        raise ValueError('process_job needs details, a driver, a backend or a page cache')
+    with METRICS.timer('process_job'):
+        card = extract_job_card(job)
+        if details is None:
+            details = get_job_details(base_url + card.job_link, driver, backend, cache)
+        return process_card(card, page_no, job_keyword, location_keyword,
+                            selected_country, base_url, details)
+
+
+def scrape_search(csv_writer, driver: Optional[webdriver.Firefox], job_keyword: str,
+                  location_keyword: str, selected_country: str, base_url: str,
+                  backend=None, write_lock: Optional[threading.Lock] = None,
+                  checkpoint=None, seen_jobs=None, crawl_state=None,
+                  known_jobs=None, extractor: str = 'xpath', detail_queue=None,
+                  cache: Optional[PageCache] = None) -> None:
+    '''
+    Process all result pages of a single keyword/location search.
+    Rows are written under write_lock when one is given. With a checkpoint
+    (utils.checkpoint.CheckpointStore), completed pages and already written
+    jobs are skipped, and progress is recorded as each one completes.
+    With seen_jobs, postings scraped before are written from cached detail
+    fields, or skipped entirely if the index is set to skip them.
+
+    With a crawl_state (utils.crawl_state.CrawlState) the search is
+    refreshed incrementally: results are requested newest first, limited
+    to the days since the last crawl, and the search stops at the first
+    posting found in known_jobs (job keys already in the dataset, by
+    default seen_jobs). The crawl time is recorded once the search is done.
+
+    With extractor='embedded', cards, salaries and description snippets are
+    read from the JSON embedded in each results page (see extract_listings)
+    and only jobs without a snippet need their detail page loaded.
+
+    With a detail_queue (utils.detail_queue.DetailQueue) no detail page is
+    loaded here: records are written with the fields already known, and
+    jobs that lack details are submitted to the queue for a later phase.
+    '''
+    write_lock = write_lock or threading.Lock()
+    if checkpoint and checkpoint.is_search_done(job_keyword, location_keyword):
+        print(f"Search for {job_keyword} in {location_keyword} already done, skipping...")
+        return
+    
+    search_options = {}
+    if crawl_state is not None:
+        crawl_started = time.time()
+        search_options = dict(sort_by_date=True, max_age_days=crawl_state.max_age_days(
+            selected_country, job_keyword, location_keyword, crawl_started))
+        known_jobs = known_jobs if known_jobs is not None else seen_jobs
+    
+    print(f"Searching for: {job_keyword} in {location_keyword} ({selected_country})")
+    try:
+        total_pages = get_total_pages(driver, job_keyword, location_keyword, base_url, backend,
+                                      raise_errors=True, cache=cache, **search_options)
+        # A search without results is complete; one whose count failed is not
+        search_complete = True
+    except Exception:
+        total_pages, search_complete = 0, False
+    print(f"Total pages found in {location_keyword} in {selected_country}: {total_pages}")
+    
+    # Job keys seen in this search, used to stop once pages only repeat them
+    search_job_keys = set()
+    for page_no in range(total_pages):
+        if checkpoint and checkpoint.is_page_done(job_keyword, location_keyword, page_no):
+            print(f"Page {page_no + 1} for {job_keyword} in {location_keyword} already done, skipping...")
+            continue
+        
+        print(f"Fetching page {page_no + 1} for {job_keyword} in {location_keyword}")
+        url = get_search_url(base_url, job_keyword, location_keyword, page_no, **search_options)
+        with METRICS.timer('results_page'):
+            page_dom = load_dom(url, driver, backend, cache)
+        
+        if page_dom is None:
+            print(f"Failed to load page {page_no + 1}, skipping...")
+            METRICS.incr('results_page_failures')
+            search_complete = False
+            continue
+        
+        with METRICS.timer('extract_cards'):
+            cards, page_details = extract_listings(page_dom, extractor)
+        cards = [card for card in cards if get_job_key(card.job_link) not in search_job_keys]
+        print(f"New jobs found on page {page_no + 1}: {len(cards)}")
+        if not cards:
+            print(f"No new jobs on page {page_no + 1}, stopping search "
+                  f"for {job_keyword} in {location_keyword}")
+            break
+        search_job_keys.update(get_job_key(card.job_link) for card in cards)
+        
+        reached_known = False
+        if crawl_state is not None and known_jobs is not None:
+            # Results are newest first, so everything after a known posting is known too
+            for i, card in enumerate(cards):
+                if get_job_key(card.job_link) in known_jobs:
+                    cards, reached_known = cards[:i], True
+                    break
+        
+        if checkpoint:
+            cards = [card for card in cards
+                     if not checkpoint.is_job_done(job_keyword, location_keyword,
+                                                   get_job_key(card.job_link))]
+        if seen_jobs is not None and seen_jobs.skip_seen:
+            cards = [card for card in cards if get_job_key(card.job_link) not in seen_jobs]
+        
+        job_links = [base_url + card.job_link for card in cards]
+        if detail_queue is not None:
+            job_keys = [get_job_key(card.job_link) for card in cards]
+            known_details = lookup_jobs_details(job_keys, seen_jobs, page_details)
+            # Fields the results page had without a description are still worth writing
+            jobs_details = [details or page_details.get(job_key)
+                            or dict.fromkeys(DETAIL_FIELDS, 'Not available')
+                            for job_key, details in zip(job_keys, known_details)]
+            for job_link, details in zip(job_links, jobs_details):
+                detail_queue.submit(job_link, details)
+        else:
+            jobs_details = get_jobs_details(job_links, driver, backend, seen_jobs, page_details,
+                                            cache)
+        
+        page_complete = True
+        written_cards = []
+        for card, details in zip(cards, jobs_details):
+            try:
+                record = process_card(card, page_no, job_keyword, location_keyword,
+                                      selected_country, base_url, details)
+                with write_lock, METRICS.timer('write'):
+                    csv_writer.writerow(record)
+                written_cards.append(card)
+                METRICS.incr('jobs_written')
+            except Exception as e:
+                page_complete = False
+                METRICS.incr('job_failures')
+                print(f"Error processing job: {e}")
+        
+        if checkpoint:
+            # Batched sinks (utils.sinks) must persist rows before progress is recorded
+            if hasattr(csv_writer, 'flush'):
+                csv_writer.flush()
+            for card in written_cards:
+                checkpoint.mark_job_done(job_keyword, location_keyword,
+                                         get_job_key(card.job_link))
+            if page_complete:
+                checkpoint.mark_page_done(job_keyword, location_keyword, page_no)
+        search_complete = search_complete and page_complete
+        if reached_known:
+            print(f"Reached known postings on page {page_no + 1}, stopping search "
+                  f"for {job_keyword} in {location_keyword}")
+            break
+    
+    if checkpoint and search_complete:
+        checkpoint.mark_search_done(job_keyword, location_keyword)
+    if crawl_state is not None and search_complete:
+        crawl_state.mark_crawled(selected_country, job_keyword, location_keyword, crawl_started)
+
+
+def scrape_jobs(csv_writer, driver: Optional[webdriver.Firefox], job_keywords: List[str], 
+                location_keywords: List[str], selected_country: str, base_url: str,
+                backend=None, max_workers: int = 1, checkpoint=None,
+                seen_jobs=None, crawl_state=None, known_jobs=None,
+                extractor: str = 'xpath', detail_queue=None,
+                cache: Optional[PageCache] = None) -> None:
     '''
     Main scraping function to process all jobs across pages and locations.
+    Records go to csv_writer, a csv.writer or a batched sink from utils.sinks.
+    Pages are loaded with the WebDriver, or with the given fetch backend
+    (utils.http_fetcher.AsyncFetcher or utils.driver_pool.DriverPool),
+    which fetches the detail pages of each results page concurrently.
+    With a backend, up to max_workers keyword/location searches run at once.
+    Passing a checkpoint makes the run resumable after a crash; it is
+    cleared once every search is done, so the next call starts a fresh run.
+    Passing seen_jobs avoids reloading detail pages of postings scraped before.
+    Passing a crawl_state only fetches postings newer than the last run
+    (see scrape_search); write to the existing dataset to merge them in.
+    extractor='embedded' reads listings from the JSON embedded in results
+    pages, which saves most detail-page loads. Passing a detail_queue defers
+    detail pages to a separate phase (see utils.detail_queue).
+    Without a backend, the WebDriver is run in a one-browser DriverPool, so
+    a crashed browser is restarted and the page retried; pages go through
+    the optional page cache (utils.page_cache.PageCache). Given neither, the
+    cache in replay mode is the only source of pages.
+    Stage timings are collected when utils.metrics is enabled; the caller
+    reports them once the whole run is done, with METRICS.report().
     '''
-    for job_keyword in job_keywords:
-        for location_keyword in location_keywords:
-            print(f"Searching for: {job_keyword} in {location_keyword} ({selected_country})")
-            total_pages = get_total_pages(driver, job_keyword, location_keyword, base_url)
-            print(f"Total pages found in {location_keyword} in {selected_country}: {total_pages}")
-            
-            for page_no in range(total_pages):
-                print(f"Fetching page {page_no + 1} for {job_keyword} in {location_keyword}")
-                url = f"{base_url}/jobs?q={job_keyword}&l={location_keyword}&start={page_no * 10}"
-                page_dom = get_dom(url, driver)
-                
-                if page_dom is None:
-                    print(f"Failed to load page {page_no + 1}, skipping...")
-                    continue
-                
-                jobs = page_dom.xpath('//div[@class="job_seen_beacon"]')
-                print(f"Jobs found on page {page_no + 1}: {len(jobs)}")
-                
-                for job in jobs:
-                    try:
-                        record = process_job(job, page_no, job_keyword, 
-                                          location_keyword, selected_country, base_url)
-                        csv_writer.writerow(record)
-                        time.sleep(random.uniform(2, 5))
-                    except Exception as e:
-                        print(f"Error processing job: {e}")
\ No newline at end of file
+    searches = [(job_keyword, location_keyword)
+                for job_keyword in job_keywords
+                for location_keyword in location_keywords]
+    pool = None
+    if backend is None and driver is not None:
+        # Imported here, as utils.driver_pool imports this module
+        from utils.driver_pool import DriverPool
+        backend = pool = DriverPool(size=1, cache=cache, recycle_after_pages=None)
+        pool.adopt(driver)
+    try:
+        # A single browser runs one search at a time
+        _run_searches(searches, backend, 1 if pool is not None else max_workers,
+                      csv_writer=csv_writer, driver=driver,
+                      selected_country=selected_country, base_url=base_url,
+                      checkpoint=checkpoint, seen_jobs=seen_jobs, crawl_state=crawl_state,
+                      known_jobs=known_jobs, extractor=extractor,
+                      detail_queue=detail_queue, cache=cache)
+        if checkpoint is not None and all(checkpoint.is_search_done(*search)
+                                          for search in searches):
+            print(f'All {len(searches)} searches done, clearing checkpoint {checkpoint.path}')
+            checkpoint.reset()
+    finally:
+        if pool is not None:
+            pool.close()
+
+
+def _run_searches(searches: List[Tuple[str, str]], backend, max_workers: int,
+                  **search_kwargs) -> None:
+    search_kwargs.update(backend=backend, write_lock=threading.Lock())
+    if backend is None or max_workers <= 1:
+        for job_keyword, location_keyword in searches:
+            scrape_search(job_keyword=job_keyword, location_keyword=location_keyword,
+                          **search_kwargs)
+        return
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(scrape_search, job_keyword=job_keyword,
+                                   location_keyword=location_keyword, **search_kwargs)
+                   for job_keyword, location_keyword in searches]
+        for future in as_completed(futures):
+            future.result()